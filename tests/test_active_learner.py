@@ -28,6 +28,13 @@ from tssl.enums.active_learner_enums import (
     ValidationType,
 )
 from tssl.active_learner.safe_active_learner import SafeActiveLearner
+from tssl.active_learner.refit_policies import (
+    EveryStepRefitPolicy,
+    EveryKStepsRefitPolicy,
+    GeometricRefitPolicy,
+    MarginalLikelihoodDropRefitPolicy,
+    PredictiveLikelihoodDropRefitPolicy,
+)
 from tssl.acquisition_function.acquisition_function_factory import AcquisitionFunctionFactory
 from tssl.configs.acquisition_function.safe_acquisition_functions.safe_pred_entropy_config import BasicSafePredEntropyAllConfig
 
@@ -64,3 +71,74 @@ def test_safe_active_learner(tmp_path):
     learner.set_train_data(*data_init)
     learner.set_test_data(*data_test)
     _, _, _ = learner.learn(5)
+
+
+def test_safe_active_learner_incremental_update():
+    oracle = BraninHoo(0.1, normalize_output=True)
+    pool = PoolFromOracle(oracle)
+    pool.discretize_random(2000)
+    acq_func = AcquisitionFunctionFactory.build(
+        BasicSafePredEntropyAllConfig(safety_thresholds_lower=-np.inf, safety_thresholds_upper=np.inf)
+    )
+    model = ModelFactory.build(
+        GPModelFastConfig(kernel_config = BasicRBFConfig(input_dimension=oracle.get_dimension()))
+    )
+    data_init = pool.get_random_data(10, noisy=True)
+    data_test = pool.get_random_data(100, noisy=True)
+
+    learner = SafeActiveLearner(
+        acq_func, ValidationType.RMSE,
+        query_noisy=True,
+        model_is_safety_model=True,
+        incremental_update=True
+    )
+    learner.set_pool(pool)
+    learner.set_model(model, safety_models=None)
+    learner.set_train_data(*data_init)
+    learner.set_test_data(*data_test)
+    lengthscales = None
+    for _ in range(3):
+        learner.learn(1)
+        if lengthscales is None:
+            lengthscales = model.kernel.kernel.lengthscales.numpy()
+        assert np.allclose(lengthscales, model.kernel.kernel.lengthscales.numpy())
+        assert model.posterior_cache.num_data == learner.x_data.shape[0] - 1
+
+
+@pytest.mark.parametrize(
+    "refit_policy,expected_refit_steps",
+    [
+        (EveryStepRefitPolicy(), [0, 1, 2, 3, 4, 5, 6]),
+        (EveryKStepsRefitPolicy(3), [0, 3, 6]),
+        (GeometricRefitPolicy(2.0), [0, 1, 2, 4]),
+        (MarginalLikelihoodDropRefitPolicy(np.inf, max_steps_without_refit=4), [0, 4]),
+        (PredictiveLikelihoodDropRefitPolicy(np.inf), [0]),
+    ]
+)
+def test_safe_active_learner_refit_policy(refit_policy, expected_refit_steps):
+    oracle = BraninHoo(0.1, normalize_output=True)
+    pool = PoolFromOracle(oracle)
+    pool.discretize_random(2000)
+    acq_func = AcquisitionFunctionFactory.build(
+        BasicSafePredEntropyAllConfig(safety_thresholds_lower=-np.inf, safety_thresholds_upper=np.inf)
+    )
+    model = ModelFactory.build(
+        GPModelFastConfig(kernel_config = BasicRBFConfig(input_dimension=oracle.get_dimension()))
+    )
+    data_init = pool.get_random_data(10, noisy=True)
+    data_test = pool.get_random_data(100, noisy=True)
+
+    learner = SafeActiveLearner(
+        acq_func, ValidationType.RMSE,
+        query_noisy=True,
+        model_is_safety_model=True,
+        refit_policy=refit_policy
+    )
+    learner.set_pool(pool)
+    learner.set_model(model, safety_models=None)
+    learner.set_train_data(*data_init)
+    learner.set_test_data(*data_test)
+    learner.learn(6)
+    assert learner.refit_steps == expected_refit_steps
+    assert model.posterior_cache.num_data == learner.x_data.shape[0] - 1
+
@@ -0,0 +1,59 @@
+"""
+// Copyright (c) 2024 Robert Bosch GmbH
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU Affero General Public License as published
+// by the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU Affero General Public License for more details.
+//
+// You should have received a copy of the GNU Affero General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+import numpy as np
+from tssl.oracles import BraninHoo
+from tssl.models.model_factory import ModelFactory
+from tssl.configs.models.gp_model_config import GPModelFastConfig
+from tssl.configs.kernels.rbf_configs import BasicRBFConfig
+from tssl.utils.model_fit_executors import SequentialFitExecutor, ThreadFitExecutor, ProcessFitExecutor
+
+
+@pytest.mark.parametrize(
+    "executor_class,kwargs",
+    [
+        (SequentialFitExecutor, {}),
+        (ThreadFitExecutor, {"n_workers": 2}),
+        (ProcessFitExecutor, {"n_workers": 2}),
+    ]
+)
+def test_fit_executor(executor_class, kwargs):
+    oracle = BraninHoo(0.01)
+    x_data, y_data = oracle.get_random_data(30)
+    x_test, _ = oracle.get_random_data(10)
+    models = [
+        ModelFactory.build(GPModelFastConfig(kernel_config=BasicRBFConfig(input_dimension=oracle.get_dimension())))
+        for _ in range(2)
+    ]
+    datasets = [(x_data[:20], y_data[:20]), (x_data[:20], -y_data[:20])]
+    initial_lengthscales = models[0].kernel.kernel.lengthscales.numpy()
+
+    executor = executor_class(**kwargs)
+    fit_times = executor.fit(models, datasets, refit=True)
+    assert len(fit_times) == 2
+    for model, (x, y) in zip(models, datasets):
+        assert not np.allclose(initial_lengthscales, model.kernel.kernel.lengthscales.numpy())
+        assert model.posterior_cache.num_data == 20
+        mu, _ = model.predictive_dist(x)
+        assert np.corrcoef(mu, y[:, 0])[0, 1] > 0.9
+
+    datasets = [(x_data, y_data), (x_data, -y_data)]
+    executor.fit(models, datasets, refit=False)
+    for model in models:
+        assert model.posterior_cache.num_data == 30
+        model.predictive_dist(x_test)
+    executor.shutdown()
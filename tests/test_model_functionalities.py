@@ -18,12 +18,23 @@ import logging
 from statistics import mode
 import time
 import gpflow
+import tensorflow as tf
 from tssl.models.model_factory import ModelFactory
 from gpflow.utilities.utilities import print_summary
 from tssl.configs.kernels.matern52_configs import Matern52WithPriorConfig
 from tssl.configs.kernels.matern32_configs import Matern32WithPriorConfig
 from tssl.configs.kernels.rbf_configs import BasicRBFConfig, RBFWithPriorConfig
-from tssl.configs.models.gp_model_config import BasicGPModelConfig, GPModelFastConfig, GPModelWithNoisePriorConfig
+from tssl.configs.models.gp_model_config import (
+    BasicGPModelConfig,
+    GPModelFastConfig,
+    GPModelWithNoisePriorConfig,
+    GPModelBatchedMultiStartConfig,
+    GPModelScreenedMultiStartConfig,
+)
+from tssl.models.batched_gpr import BatchedGPRObjective
+from tssl.configs.models.mogp_model_so_config import BasicSOMOGPModelConfig
+from tssl.configs.models.mogp_model_transfer_config import BasicTransferGPModelConfig
+from tssl.configs.kernels.multi_output_kernels.multi_source_additive_kernel_configs import BasicMIAdditiveConfig
 from tssl.enums.global_model_enums import PredictionQuantity as PredictionQuantMarg
 from tssl.enums.global_model_enums import InitialParameters
 from tssl.oracles import BraninHoo
@@ -88,3 +99,157 @@ def test_gp_model_reset():
     assert np.allclose(lengthscale_before_training, lengthscale_after_reset)
     assert np.allclose(variance_before_training, variance_after_reset)
 
+
+
+def test_gp_model_condition_on_data():
+    oracle = BraninHoo(0.01)
+    x_data, y_data = oracle.get_random_data(30)
+    x_test, _ = oracle.get_random_data(10)
+    kernel_config = Matern52WithPriorConfig(input_dimension=oracle.get_dimension())
+    model_config = GPModelFastConfig(kernel_config=kernel_config)
+    gp_model = ModelFactory.build(model_config)
+    gp_model.infer(x_data[:20], y_data[:20])
+    lengthscale_after_training = gp_model.kernel.kernel.lengthscales.numpy()
+    gp_model.condition_on_data(x_data[:25], y_data[:25])
+    gp_model.condition_on_data(x_data, y_data)
+    assert gp_model.posterior_cache.num_data == 30
+    assert np.allclose(lengthscale_after_training, gp_model.kernel.kernel.lengthscales.numpy())
+    mu, sigma = gp_model.predictive_dist(x_test)
+    log_evidence = gp_model.estimate_model_evidence()
+    gp_model.posterior_cache.clear()
+    mu_ref, sigma_ref = gp_model.predictive_dist(x_test)
+    assert np.allclose(mu, mu_ref)
+    assert np.allclose(sigma, sigma_ref)
+    assert np.allclose(log_evidence, gp_model.estimate_model_evidence())
+
+
+@pytest.mark.parametrize("model_config_class", [BasicSOMOGPModelConfig, BasicTransferGPModelConfig])
+def test_mogp_model_condition_on_data(model_config_class):
+    oracle = BraninHoo(0.01)
+    x_source, y_source = oracle.get_random_data(30)
+    x_target, y_target = oracle.get_random_data(15)
+    x_data = np.vstack((
+        np.hstack((x_source, np.zeros([30, 1]))),
+        np.hstack((x_target, np.ones([15, 1])))
+    ))
+    y_data = np.vstack((y_source, y_target))
+    x_test = np.hstack((oracle.get_random_data(10)[0], np.ones([10, 1])))
+    kernel_config = BasicMIAdditiveConfig(input_dimension=oracle.get_dimension())
+    model_config = model_config_class(kernel_config=kernel_config, perform_multi_start_optimization=False)
+    model = ModelFactory.build(model_config)
+    model.infer(x_data[:40], y_data[:40])
+    model.condition_on_data(x_data, y_data)
+    assert model.posterior_cache.num_data == 45
+    mu, sigma = model.predictive_dist(x_test)
+    model.posterior_cache.clear()
+    mu_ref, sigma_ref = model.predictive_dist(x_test)
+    assert np.allclose(mu, mu_ref)
+    assert np.allclose(sigma, sigma_ref)
+
+
+def test_gp_model_warm_start():
+    oracle = BraninHoo(0.01)
+    x_data, y_data = oracle.get_random_data(30)
+    kernel_config = Matern52WithPriorConfig(input_dimension=oracle.get_dimension())
+    model_config = BasicGPModelConfig(
+        kernel_config=kernel_config, warm_start_optimization=True, n_starts_for_multistart_opt=3, cold_restart_every=3
+    )
+    gp_model = ModelFactory.build(model_config)
+    gp_model.infer(x_data[:25], y_data[:25])
+    assert gp_model.warm_start_parameter_cache.has_parameters
+    gp_model.reset_model()
+    gp_model.infer(x_data, y_data)
+    # the first start is the previous optimum, the optimized parameters are stored for the next step
+    assert np.isclose(gp_model.training_loss(), np.min(gp_model.multi_start_losses))
+    assert np.allclose(
+        gp_model.warm_start_parameter_cache.parameters_list[0][0], gp_model.model.trainable_parameters[0].numpy()
+    )
+    assert [gp_model.warm_start_parameter_cache.start_inference() for _ in range(4)] == [True, False, True, True]
+
+
+@pytest.mark.parametrize("model_config_class", [BasicSOMOGPModelConfig, BasicTransferGPModelConfig])
+def test_mogp_model_warm_start(model_config_class):
+    oracle = BraninHoo(0.01)
+    x_source, y_source = oracle.get_random_data(30)
+    x_target, y_target = oracle.get_random_data(15)
+    x_data = np.vstack((
+        np.hstack((x_source, np.zeros([30, 1]))),
+        np.hstack((x_target, np.ones([15, 1])))
+    ))
+    y_data = np.vstack((y_source, y_target))
+    kernel_config = BasicMIAdditiveConfig(input_dimension=oracle.get_dimension())
+    model_config = model_config_class(kernel_config=kernel_config, n_starts_for_multistart_opt=2, warm_start_optimization=True)
+    model = ModelFactory.build(model_config)
+    model.infer(x_data[:40], y_data[:40])
+    assert model.warm_start_parameter_cache.has_parameters
+    model.reset_model()
+    model.infer(x_data, y_data)
+    assert model.warm_start_parameter_cache.n_inferences == 2
+    assert np.isclose(model.training_loss(), np.min(model.multi_start_losses))
+
+
+@pytest.mark.parametrize("model_config_class", [BasicGPModelConfig, BasicSOMOGPModelConfig])
+def test_multistart_seeds_parallel(model_config_class):
+    oracle = BraninHoo(0.01)
+    x_data, y_data = oracle.get_random_data(20)
+    if model_config_class == BasicSOMOGPModelConfig:
+        x_data = np.hstack((x_data, np.array([[0.0], [1.0]] * 10)))
+        kernel_config = BasicMIAdditiveConfig(input_dimension=oracle.get_dimension())
+    else:
+        kernel_config = Matern52WithPriorConfig(input_dimension=oracle.get_dimension())
+    losses = []
+    for n_workers in [1, 2]:
+        model_config = model_config_class(
+            kernel_config=kernel_config, n_starts_for_multistart_opt=3, multistart_seed=123, n_workers_for_multistart_opt=n_workers
+        )
+        model = ModelFactory.build(model_config)
+        model.infer(x_data, y_data)
+        losses.append(np.array(model.multi_start_losses))
+        assert np.isclose(model.training_loss(), np.min(model.multi_start_losses))
+    # restart i gets the same seed independent of the number of workers
+    assert np.allclose(losses[0], losses[1], rtol=1e-4)
+
+
+@pytest.mark.parametrize("kernel_config_class", [Matern52WithPriorConfig, BasicRBFConfig])
+def test_gp_model_batched_multistart(kernel_config_class):
+    oracle = BraninHoo(0.01)
+    x_data, y_data = oracle.get_random_data(20)
+    kernel_config = kernel_config_class(input_dimension=oracle.get_dimension())
+    model_config = GPModelBatchedMultiStartConfig(kernel_config=kernel_config, n_starts_for_multistart_opt=3)
+    gp_model = ModelFactory.build(model_config)
+    gp_model.build_model(x_data, y_data)
+    objective = BatchedGPRObjective(gp_model.model)
+    thetas = []
+    losses = []
+    for _ in range(3):
+        gp_model.sample_initial_parameters()
+        thetas.append(objective.get_theta())
+        losses.append(gp_model.training_loss().numpy())
+    assert np.allclose(objective.loss(tf.constant(np.array(thetas))).numpy(), losses)
+    gp_model.infer(x_data, y_data)
+    assert len(gp_model.multi_start_losses) == 3
+    assert np.isclose(gp_model.training_loss(), np.min(gp_model.multi_start_losses))
+
+
+@pytest.mark.parametrize(
+    "start_parameters_class,kernel_config_class",
+    [
+        (InitialParameters.SOBOL, BasicRBFConfig),
+        (InitialParameters.PRIOR_SAMPLES, Matern52WithPriorConfig),
+    ],
+)
+def test_gp_model_screened_multistart(start_parameters_class, kernel_config_class):
+    oracle = BraninHoo(0.01)
+    x_data, y_data = oracle.get_random_data(20)
+    kernel_config = kernel_config_class(input_dimension=oracle.get_dimension())
+    model_config = GPModelScreenedMultiStartConfig(
+        kernel_config=kernel_config, initial_parameter_strategy=start_parameters_class, n_screening_candidates=64, n_starts_for_multistart_opt=2
+    )
+    gp_model = ModelFactory.build(model_config)
+    gp_model.infer(x_data, y_data)
+    screened_losses = gp_model.screened_parameter_cache.loss_list
+    assert len(screened_losses) == 2 and screened_losses[0] <= screened_losses[1]
+    # screening loss of the best candidate agrees with the gpflow loss
+    gp_model.screened_parameter_cache.load_parameters_to_model(gp_model.model, 0)
+    assert np.isclose(gp_model.training_loss().numpy(), screened_losses[0])
+    assert np.min(gp_model.multi_start_losses) <= screened_losses[0]
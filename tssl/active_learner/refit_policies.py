@@ -0,0 +1,193 @@
+"""
+// Copyright (c) 2024 Robert Bosch GmbH
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU Affero General Public License as published
+// by the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU Affero General Public License for more details.
+//
+// You should have received a copy of the GNU Affero General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+import logging
+from abc import ABC
+from typing import Optional, Sequence
+from tssl.models.base_model import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class BaseRefitPolicy(ABC):
+    r"""
+    Decides in which inference steps of the active learning loop the hyperparameters are retrained.
+    In all other steps the models are only conditioned on the new data (see BaseModel.condition_on_data).
+
+    The learner asks the policy twice per step:
+        1. scheduled_refit(step) - before anything is computed, a True skips the conditioning
+        2. triggered_refit(step, models, n_data, new_log_likelihoods) - after the models are conditioned on the new data
+    After each refit, refitted(step, models, n_data) is called so triggers can store their reference values.
+    The very first inference is always a refit.
+
+    Attributes:
+        uses_predictive_log_likelihood: bool - if True, the learner computes the predictive log likelihood of
+            the new points before conditioning and passes it to triggered_refit
+    """
+    uses_predictive_log_likelihood = False
+
+    def reset(self):
+        pass
+
+    def scheduled_refit(self, step: int) -> bool:
+        return False
+
+    def triggered_refit(
+        self,
+        step: int,
+        models: Sequence[BaseModel],
+        n_data: Sequence[int],
+        new_log_likelihoods: Optional[Sequence[np.ndarray]] = None
+    ) -> bool:
+        return False
+
+    def refitted(self, step: int, models: Sequence[BaseModel], n_data: Sequence[int]):
+        pass
+
+
+class EveryStepRefitPolicy(BaseRefitPolicy):
+    r"""
+    retrain the hyperparameters in every step (default behavior of the learner)
+    """
+    def scheduled_refit(self, step: int) -> bool:
+        return True
+
+
+class InitialOnlyRefitPolicy(BaseRefitPolicy):
+    r"""
+    retrain the hyperparameters only in the first inference, afterwards only condition on new data
+    """
+
+
+class EveryKStepsRefitPolicy(BaseRefitPolicy):
+    r"""
+    retrain the hyperparameters every k steps
+
+    Arguments:
+        k: int - number of steps between two refits (k=1 retrains in every step)
+    """
+    def __init__(self, k: int):
+        assert k >= 1
+        self.k = k
+        self.reset()
+
+    def reset(self):
+        self.last_refit_step = 0
+
+    def scheduled_refit(self, step: int) -> bool:
+        return step - self.last_refit_step >= self.k
+
+    def refitted(self, step: int, models: Sequence[BaseModel], n_data: Sequence[int]):
+        self.last_refit_step = step
+
+
+class GeometricRefitPolicy(BaseRefitPolicy):
+    r"""
+    retrain the hyperparameters with geometrically growing gaps: the step after a refit at step s
+    is max(s + 1, ceil(ratio * s)), i.e. steps 1, 2, 4, 8, ... for ratio=2.
+    The hyperparameters change most while the data set is small, so early steps are refitted more often.
+
+    Arguments:
+        ratio: float > 1 - growth factor of the refit steps
+    """
+    def __init__(self, ratio: float = 2.0):
+        assert ratio > 1.0
+        self.ratio = ratio
+        self.reset()
+
+    def reset(self):
+        self.next_refit_step = 1
+
+    def scheduled_refit(self, step: int) -> bool:
+        return step >= self.next_refit_step
+
+    def refitted(self, step: int, models: Sequence[BaseModel], n_data: Sequence[int]):
+        self.next_refit_step = max(step + 1, int(np.ceil(self.ratio * step)))
+
+
+class LikelihoodDropRefitPolicy(BaseRefitPolicy):
+    r"""
+    base class for triggers which compare a log likelihood per data point with the
+    log marginal likelihood per data point at the last refit, log p(Y) / N.
+    By the chain rule, log p(Y) = sum_i log p(y_i | y_<i), so log p(Y) / N is the average predictive log likelihood
+    of the data under the fitted hyperparameters.
+
+    Arguments:
+        threshold: float - a refit is triggered if a value drops by more than threshold (nats per data point)
+            below the reference of any of the models
+        max_steps_without_refit: int - optionally refit at least after this many steps
+    """
+    def __init__(self, threshold: float, max_steps_without_refit: Optional[int] = None):
+        self.threshold = threshold
+        self.max_steps_without_refit = max_steps_without_refit
+        self.reset()
+
+    def reset(self):
+        self.last_refit_step = 0
+        self.reference = None
+
+    def scheduled_refit(self, step: int) -> bool:
+        if self.max_steps_without_refit is None:
+            return False
+        return step - self.last_refit_step >= self.max_steps_without_refit
+
+    def refitted(self, step: int, models: Sequence[BaseModel], n_data: Sequence[int]):
+        self.last_refit_step = step
+        self.reference = [m.estimate_model_evidence() / n for m, n in zip(models, n_data)]
+
+    def _dropped(self, values: Sequence[float]) -> bool:
+        if self.reference is None:
+            return False
+        for i, (value, reference) in enumerate(zip(values, self.reference)):
+            if value < reference - self.threshold:
+                logger.info(f'model {i}: log likelihood per point {value:.4f} dropped below reference {reference:.4f}')
+                return True
+        return False
+
+
+class MarginalLikelihoodDropRefitPolicy(LikelihoodDropRefitPolicy):
+    r"""
+    refit if the log marginal likelihood per data point of the conditioned models drops by more than threshold
+    """
+    def triggered_refit(
+        self,
+        step: int,
+        models: Sequence[BaseModel],
+        n_data: Sequence[int],
+        new_log_likelihoods: Optional[Sequence[np.ndarray]] = None
+    ) -> bool:
+        return self._dropped([m.estimate_model_evidence() / n for m, n in zip(models, n_data)])
+
+
+class PredictiveLikelihoodDropRefitPolicy(LikelihoodDropRefitPolicy):
+    r"""
+    refit if the predictive log likelihood of a new point (computed before conditioning on it)
+    is more than threshold below the log marginal likelihood per data point at the last refit
+    """
+    uses_predictive_log_likelihood = True
+
+    def triggered_refit(
+        self,
+        step: int,
+        models: Sequence[BaseModel],
+        n_data: Sequence[int],
+        new_log_likelihoods: Optional[Sequence[np.ndarray]] = None
+    ) -> bool:
+        assert new_log_likelihoods is not None
+        return self._dropped([
+            np.min(ll) if np.size(ll) > 0 else np.inf for ll in new_log_likelihoods
+        ])
@@ -28,6 +28,8 @@ from tssl.utils.safety_metrices import SafetyAreaMeasure
 from tssl.enums.data_structure_enums import OutputType
 from tssl.enums.active_learner_enums import ValidationType
 from tssl.models.base_model import BaseModel
+from tssl.active_learner.refit_policies import BaseRefitPolicy, EveryStepRefitPolicy, InitialOnlyRefitPolicy
+from tssl.utils.model_fit_executors import BaseFitExecutor, SequentialFitExecutor
 from tssl.acquisition_function.safe_acquisition_functions.base_safe_acquisition_function import BaseSafeAcquisitionFunction
 from tssl.pools.base_pool import BasePool
 from tssl.pools.base_pool_with_safety import BasePoolWithSafety
@@ -44,6 +46,13 @@ class SafeActiveLearner:
         model_is_safety_model: bool - whether the safety is constrained directly on the main model or not
         save_results: bool - whether we save the plots/result or not
         experiment_path: str - path where we save files
+        incremental_update: bool - if True, the hyperparameters are only trained in the first inference,
+                            afterwards the models are conditioned on the new data (rank-1 cholesky updates instead of refactorization)
+        refit_policy: BaseRefitPolicy - decides in which steps the hyperparameters are retrained, the models are
+                            only conditioned on the new data in all other steps (see tssl.active_learner.refit_policies),
+                            default: InitialOnlyRefitPolicy if incremental_update else EveryStepRefitPolicy
+        fit_executor: BaseFitExecutor - how the main and safety models are fitted, e.g. ThreadFitExecutor or ProcessFitExecutor
+                            to fit them concurrently (see tssl.utils.model_fit_executors), default: SequentialFitExecutor
     """
 
     def __init__(
@@ -55,7 +64,10 @@ class SafeActiveLearner:
         run_ccl: bool=True,
         tolerance: Union[float, Sequence[float]]=0.01,
         save_results: bool=False,
-        experiment_path: str=None
+        experiment_path: str=None,
+        incremental_update: bool=False,
+        refit_policy: BaseRefitPolicy=None,
+        fit_executor: BaseFitExecutor=None
         ):
         self.acquisition_function = acquisition_function
         self.validation_type = validation_type
@@ -75,6 +87,16 @@ class SafeActiveLearner:
         self.tolerance = tolerance
         self.save_results = save_results
         self.exp_path = experiment_path
+        self.incremental_update = incremental_update
+        if refit_policy is None:
+            refit_policy = InitialOnlyRefitPolicy() if incremental_update else EveryStepRefitPolicy()
+        self.refit_policy = refit_policy
+        self.refit_policy.reset()
+        self.refit_steps = []
+        self.fit_executor = fit_executor if fit_executor is not None else SequentialFitExecutor()
+        self.__models_inferred = False
+        self.__infer_step = 0
+        self.__n_data_inferred = None
         self.__save_model_pars = False
 
     def set_pool(self, pool: Union[BasePool, BasePoolWithSafety]):
@@ -384,22 +406,40 @@ class SafeActiveLearner:
 
 
     def _make_infer(self):
-        self.model.reset_model()
         idx_dim = self._return_variable_idx()
-        infer_time = []
-
-        t_opt = self.model.infer(*filter_nan(self.x_data[:, idx_dim], self.y_data))
-        
-        infer_time.append(t_opt)
+        models = [self.model]
+        datasets = [filter_nan(self.x_data[:, idx_dim], self.y_data)]
         if not self.model_is_safety_model:
             for i, model in enumerate(self.safety_models):
-                model.reset_model()
-                
-                t_opt = model.infer(*filter_nan(self.x_data[:, idx_dim], self.z_data[:, i, None]))
-                
-                infer_time.append(t_opt)
-
+                models.append(model)
+                datasets.append(filter_nan(self.x_data[:, idx_dim], self.z_data[:, i, None]))
+        n_data = [x.shape[0] for x, _ in datasets]
+        step = self.__infer_step
+
+        refit = not self.__models_inferred or self.refit_policy.scheduled_refit(step)
+        if refit:
+            infer_time = self.fit_executor.fit(models, datasets, refit=True)
+        else:
+            new_log_likelihoods = None
+            if self.refit_policy.uses_predictive_log_likelihood:
+                # the data are appended, so the new points of each model are the trailing rows
+                new_log_likelihoods = [
+                    np.atleast_1d(m.predictive_log_likelihood(x[n_old:], y[n_old:])) if x.shape[0] > n_old else np.empty(0)
+                    for m, (x, y), n_old in zip(models, datasets, self.__n_data_inferred)
+                ]
+            infer_time = self.fit_executor.fit(models, datasets, refit=False)
+            if self.refit_policy.triggered_refit(step, models, n_data, new_log_likelihoods):
+                refit = True
+                refit_time = self.fit_executor.fit(models, datasets, refit=True)
+                infer_time = [t if t_refit is None else t + t_refit for t, t_refit in zip(infer_time, refit_time)]
+
+        if refit:
+            self.refit_policy.refitted(step, models, n_data)
+            self.refit_steps.append(step)
         self.infer_time.append(tuple(infer_time))
+        self.__models_inferred = True
+        self.__infer_step += 1
+        self.__n_data_inferred = n_data
 
         if self.__save_model_pars:
             self._track_model_parameters()
@@ -33,6 +33,9 @@ from tssl.configs.models.gp_model_config import (
     GPModelFixedNoiseConfig,
     GPModelSmallPertubationConfig,
     GPModelWithNoisePriorConfig,
+    GPModelWarmStartConfig,
+    GPModelBatchedMultiStartConfig,
+    GPModelScreenedMultiStartConfig,
 )
 from tssl.configs.kernels.multi_output_kernels.coregionalization_kernel_configs import (
     BasicCoregionalizationSOConfig,
@@ -164,6 +167,9 @@ class ConfigPicker:
             GPModelWithNoisePriorConfig,
             GPModelSmallPertubationConfig,
             GPModelExtenseOptimization,
+            GPModelWarmStartConfig,
+            GPModelBatchedMultiStartConfig,
+            GPModelScreenedMultiStartConfig,
             GPModelFixedNoiseConfig,
             BasicSOMOGPModelConfig,
             BasicTransferGPModelConfig,
@@ -14,6 +14,7 @@
 // You should have received a copy of the GNU Affero General Public License
 // along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from typing import Optional
 from tssl.configs.models.base_model_config import BaseModelConfig
 from tssl.configs.kernels.base_kernel_config import BaseKernelConfig
 from tssl.enums.global_model_enums import PredictionQuantity, InitialParameters
@@ -36,6 +37,13 @@ class BasicGPModelConfig(BaseModelConfig):
     set_prior_on_observation_noise: bool = False
     expected_observation_noise: float = EXPECTED_OBSERVATION_NOISE
     prediction_quantity: PredictionQuantity = PredictionQuantity.PREDICT_Y
+    warm_start_optimization: bool = False
+    warm_start_perturbation: float = 0.1
+    cold_restart_every: int = 0
+    n_workers_for_multistart_opt: int = 1
+    multistart_seed: Optional[int] = None
+    batched_multi_start_optimization: bool = False
+    n_screening_candidates: int = 0
     name = "GPModel"
 
 
@@ -70,3 +78,22 @@ class GPModelSmallPertubationConfig(BasicGPModelConfig):
     perturbation_for_multistart_opt: float = 0.1
     name = "GPModelSmallPertubation"
 
+
+class GPModelWarmStartConfig(BasicGPModelConfig):
+    warm_start_optimization: bool = True
+    n_starts_for_multistart_opt: int = 3
+    cold_restart_every: int = 10
+    name = "GPModelWarmStart"
+
+
+
+class GPModelBatchedMultiStartConfig(BasicGPModelConfig):
+    batched_multi_start_optimization: bool = True
+    name = "GPModelBatchedMultiStart"
+
+
+class GPModelScreenedMultiStartConfig(BasicGPModelConfig):
+    initial_parameter_strategy: InitialParameters = InitialParameters.SOBOL
+    n_screening_candidates: int = 256
+    n_starts_for_multistart_opt: int = 3
+    name = "GPModelScreenedMultiStart"
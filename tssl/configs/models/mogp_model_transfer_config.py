@@ -14,6 +14,7 @@
 // You should have received a copy of the GNU Affero General Public License
 // along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from typing import Optional
 from tssl.configs.models.base_model_config import BaseModelConfig
 from tssl.configs.kernels.base_kernel_config import BaseKernelConfig
 from tssl.enums.global_model_enums import PredictionQuantity
@@ -33,6 +34,11 @@ class BasicTransferGPModelConfig(BaseModelConfig):
     n_starts_for_multistart_opt: int = 5
     set_prior_on_observation_noise : bool =False
     prediction_quantity: PredictionQuantity = PredictionQuantity.PREDICT_Y
+    warm_start_optimization: bool = False
+    warm_start_perturbation: float = 0.1
+    cold_restart_every: int = 0
+    n_workers_for_multistart_opt: int = 1
+    multistart_seed: Optional[int] = None
     name : str = "BasicTransferGP"
 
 if __name__ == '__main__':
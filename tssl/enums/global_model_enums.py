@@ -25,3 +25,5 @@ class PredictionQuantity(IntEnum):
 class InitialParameters(IntEnum):
     PERTURB = 0
     UNIFORM_DISTRIBUTION = 1
+    SOBOL = 2
+    PRIOR_SAMPLES = 3
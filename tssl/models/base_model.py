@@ -44,6 +44,20 @@ class BaseModel(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def condition_on_data(self,x_data: np.array,y_data: np.array) -> float:
+        """
+        Conditions the model on a (typically extended) data set without retraining the parameters - used between hyperparameter refits
+
+        Arguments:
+        x_data: Input array with shape (n,d) where d is the input dimension and n the number of training points
+        y_data: Label array with shape (n,m) where n is the number of training points and m the number of outputs 
+
+        Returns:
+        time needed for the update
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def predictive_dist(self,x_test: np.array) -> Tuple[np.array,np.array]:
         """
@@ -0,0 +1,232 @@
+"""
+// Copyright (c) 2024 Robert Bosch GmbH
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU Affero General Public License as published
+// by the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU Affero General Public License for more details.
+//
+// You should have received a copy of the GNU Affero General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import logging
+from typing import List, Tuple
+import numpy as np
+import gpflow
+import tensorflow as tf
+import tensorflow_probability as tfp
+from gpflow.base import PriorOn
+from tssl.kernels.base_elementary_kernel import BaseElementaryKernel
+
+logger = logging.getLogger(__name__)
+
+
+def _squared_exponential(r):
+    return tf.exp(-0.5 * tf.square(r))
+
+
+def _matern12(r):
+    return tf.exp(-r)
+
+
+def _matern32(r):
+    sqrt3 = np.sqrt(3.0)
+    return (1.0 + sqrt3 * r) * tf.exp(-sqrt3 * r)
+
+
+def _matern52(r):
+    sqrt5 = np.sqrt(5.0)
+    return (1.0 + sqrt5 * r + 5.0 / 3.0 * tf.square(r)) * tf.exp(-sqrt5 * r)
+
+
+STATIONARY_PROFILES = [
+    (gpflow.kernels.SquaredExponential, _squared_exponential),
+    (gpflow.kernels.Matern12, _matern12),
+    (gpflow.kernels.Matern32, _matern32),
+    (gpflow.kernels.Matern52, _matern52),
+]
+
+
+class BatchedGPRObjective:
+    r"""
+    Negative log posterior density (training loss) of a gpflow.models.GPR for a batch of B hyperparameter sets.
+    The trainable parameters are stacked as unconstrained vectors theta [B, P] - one batched cholesky of [B, N, N]
+    replaces B separate loss evaluations, which is much cheaper when N is small and the dispatch overhead dominates.
+
+    Only GPR with an elementary kernel (tssl RBF/Matern kernels) and trainable kernel variance, lengthscales and likelihood variance
+    are supported - see is_supported.
+    """
+
+    def __init__(self, model: gpflow.models.GPR):
+        assert self.is_supported(model)
+        self.model = model
+        self.base_kernel = model.kernel.kernel
+        self.profile = self.get_profile(self.base_kernel)
+        self.parameters = [self.base_kernel.variance, self.base_kernel.lengthscales, model.likelihood.variance]
+        self.trainable = [p.trainable for p in self.parameters]
+        self.sizes = [int(np.prod(p.shape)) if p.trainable else 0 for p in self.parameters]
+        X, Y = model.data
+        if model.kernel.active_on_single_dimension:
+            X = X[:, model.kernel.active_dimension, None]
+        self.X = X
+        self.err = Y - model.mean_function(model.data[0])
+
+    @staticmethod
+    def get_profile(kernel: gpflow.kernels.Kernel):
+        for kernel_class, profile in STATIONARY_PROFILES:
+            if isinstance(kernel, kernel_class):
+                return profile
+        return None
+
+    @staticmethod
+    def is_supported(model: gpflow.models.GPR) -> bool:
+        if not isinstance(model, gpflow.models.GPR) or not isinstance(model.kernel, BaseElementaryKernel):
+            return False
+        base_kernel = model.kernel.kernel
+        if BatchedGPRObjective.get_profile(base_kernel) is None:
+            return False
+        known = {id(p) for p in [base_kernel.variance, base_kernel.lengthscales, model.likelihood.variance]}
+        return all(id(p) in known for p in model.trainable_parameters)
+
+    @property
+    def num_parameters(self) -> int:
+        return sum(self.sizes)
+
+    def get_theta(self) -> np.ndarray:
+        """
+        current unconstrained trainable parameters of the model [P]
+        """
+        return np.concatenate([
+            p.unconstrained_variable.numpy().reshape(-1) for p, trainable in zip(self.parameters, self.trainable) if trainable
+        ])
+
+    def set_theta(self, theta: np.ndarray):
+        """
+        assigns an unconstrained parameter vector [P] to the model
+        """
+        offset = 0
+        for p, size in zip(self.parameters, self.sizes):
+            if size > 0:
+                p.unconstrained_variable.assign(np.reshape(theta[offset:offset + size], p.shape))
+                offset += size
+
+    def _split(self, theta: tf.Tensor) -> Tuple[List[tf.Tensor], tf.Tensor]:
+        B = tf.shape(theta)[0]
+        values = []
+        log_prior = tf.zeros([B], dtype=theta.dtype)
+        offset = 0
+        for p, size in zip(self.parameters, self.sizes):
+            if size == 0:
+                values.append(tf.broadcast_to(tf.reshape(tf.convert_to_tensor(p), [1, -1]), [B, int(np.prod(p.shape))]))
+                continue
+            x = theta[:, offset:offset + size]
+            offset += size
+            x = tf.reshape(x, tf.concat([[B], p.shape], axis=0))
+            y = p.transform.forward(x) if p.transform is not None else x
+            if p.prior is not None:
+                axes = list(range(1, len(p.shape) + 1))
+                if p.prior_on == PriorOn.CONSTRAINED:
+                    log_prior += tf.reduce_sum(p.prior.log_prob(y), axis=axes)
+                else:
+                    log_prior += tf.reduce_sum(p.prior.log_prob(x), axis=axes)
+                    if p.transform is not None:
+                        log_prior += p.transform.inverse_log_det_jacobian(y, len(p.shape))
+            values.append(tf.reshape(y, [B, -1]))
+        return values, log_prior
+
+    def loss(self, theta: tf.Tensor) -> tf.Tensor:
+        """
+        theta: [B, P] unconstrained parameters
+
+        return:
+            [B] negative log posterior density
+        """
+        (variance, lengthscales, noise_variance), log_prior = self._split(theta)
+        Xs = self.X[None, :, :] / lengthscales[:, None, :] # [B, N, D]
+        Xs2 = tf.reduce_sum(tf.square(Xs), axis=-1)
+        r2 = Xs2[:, :, None] + Xs2[:, None, :] - 2.0 * tf.matmul(Xs, Xs, transpose_b=True)
+        r = tf.sqrt(tf.maximum(r2, 1e-36))
+        N = tf.shape(self.X)[0]
+        K = variance[:, :1, None] * self.profile(r) + noise_variance[:, :1, None] * tf.eye(N, dtype=theta.dtype)[None]
+        L = tf.linalg.cholesky(K)
+        err = tf.broadcast_to(self.err[None], tf.concat([tf.shape(L)[:1], tf.shape(self.err)], axis=0))
+        alpha = tf.linalg.triangular_solve(L, err, lower=True)
+        R = tf.cast(tf.shape(self.err)[-1], theta.dtype)
+        lml = -0.5 * tf.reduce_sum(tf.square(alpha), axis=[-2, -1])
+        lml -= R * tf.reduce_sum(tf.math.log(tf.linalg.diag_part(L)), axis=-1)
+        lml -= 0.5 * tf.cast(N, theta.dtype) * R * np.log(2 * np.pi)
+        return -(lml + log_prior)
+
+    def minimize(
+        self,
+        theta0: np.ndarray,
+        max_iterations: int = 1000,
+        iterations_per_round: int = 50,
+        tolerance: float = 1e-8
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        batched L-BFGS on all restarts - after each round of iterations_per_round iterations the converged restarts
+        are dropped from the batch and the others continue from their current position.
+        The loss of each restart is scaled by 1 / max(1, |gradient|) at the start of a round, such that the first line search
+        starts with a moderate step (as scipy does). Restarts with a failed line search or a convergence of the scaled loss
+        continue in the next round with the new scale, until their loss stalls.
+
+        Arguments:
+            theta0: [B, P] unconstrained initial values
+
+        Returns:
+            [B, P] optimized parameters, [B] losses (inf if the loss was not finite), [B] bool converged
+        """
+        theta = np.array(theta0, dtype=np.float64)
+        B = theta.shape[0]
+        losses = np.full(B, np.inf)
+        converged = np.zeros(B, dtype=bool)
+        active = np.arange(B)
+
+        n_iterations = 0
+        while len(active) > 0 and n_iterations < max_iterations:
+            x0 = tf.constant(theta[active])
+            value, gradient = self._value_and_gradients(x0, tf.ones([len(active)], dtype=x0.dtype))
+            finite = np.isfinite(value.numpy())
+            losses[active] = np.where(finite, value.numpy(), np.inf)
+            active = active[finite]
+            if len(active) == 0:
+                break
+            x0 = tf.gather(x0, np.where(finite)[0])
+            scale = 1.0 / tf.maximum(tf.constant(1.0, dtype=x0.dtype), tf.norm(tf.gather(gradient, np.where(finite)[0]), axis=-1))
+            result = self._lbfgs_round(
+                x0, scale, tf.constant(min(iterations_per_round, max_iterations - n_iterations)), tf.constant(tolerance, dtype=x0.dtype)
+            )
+            n_iterations += int(result.num_iterations.numpy())
+            values = (result.objective_value / scale).numpy()
+            previous_losses = losses[active]
+            theta[active] = result.position.numpy()
+            losses[active] = np.where(np.isfinite(values), values, np.inf)
+            # convergence of a scaled objective is only preliminary - it is checked again with the new gradient scale
+            unscaled = scale.numpy() == 1.0
+            stalled = np.abs(previous_losses - losses[active]) <= 1e-12 * np.maximum(1.0, np.abs(previous_losses))
+            done = (result.converged.numpy() & unscaled) | stalled
+            converged[active] = done
+            logger.debug(f"Batched L-BFGS: {np.sum(done)}/{len(active)} restarts converged after {n_iterations} iterations")
+            active = active[~done]
+        return theta, losses, converged
+
+    @tf.function(reduce_retracing=True)
+    def _lbfgs_round(self, x0: tf.Tensor, scale: tf.Tensor, max_iterations: tf.Tensor, tolerance: tf.Tensor):
+        return tfp.optimizer.lbfgs_minimize(
+            lambda x: self._value_and_gradients(x, scale),
+            initial_position=x0,
+            max_iterations=max_iterations,
+            tolerance=tolerance,
+        )
+
+    def _value_and_gradients(self, theta: tf.Tensor, scale: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+        with tf.GradientTape() as tape:
+            tape.watch(theta)
+            value = self.loss(theta) * scale
+        return value, tape.gradient(value, theta)
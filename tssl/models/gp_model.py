@@ -29,11 +29,15 @@ import time
 from typing import List, Tuple, Optional, Callable
 import gpflow
 from gpflow.utilities import print_summary, set_trainable
+from gpflow.models.util import data_input_to_tensor
 from tensorflow_probability import distributions as tfd
-from tssl.utils.gp_paramater_cache import GPParameterCache
+from tssl.utils.gp_paramater_cache import GPParameterCache, WarmStartParameterCache
+from tssl.utils.gp_posterior_cache import GPPosteriorCache
+from tssl.utils.model_fit_executors import multi_start_seeds, seed_restart, run_multi_start_optimization
+from tssl.models.batched_gpr import BatchedGPRObjective
 from tssl.utils.utils import normal_entropy
 from tssl.models.base_model import BaseModel
-from scipy.stats import norm
+from scipy.stats import norm, qmc
 from tssl.enums.global_model_enums import PredictionQuantity, InitialParameters
 import tensorflow as tf
 import logging
@@ -56,6 +60,17 @@ class GPModel(BaseModel):
         initial_parameter_strategy: InitialParameters determines how the initial trainable parameters are sampled before the start of optimization
         perform_multi_start_optimization: bool if multiple initial values should be used for optimization
         set_prior_on_observation_noise: bool if prior should be applied to obvservation noise (Exponential prior with expected value self.observation_noise)
+        posterior_cache: GPPosteriorCache holding the cholesky of the noisy gram matrix for the current hyperparameters - used for prediction and
+                         extended in condition_on_data
+        n_workers_for_multistart_opt: number of processes the restarts of the multistart optimization are distributed over (1: serial)
+        multistart_seed: optional seed of the multistart optimization - restart i is reproducible independent of the number of workers
+        batched_multi_start_optimization: bool if all restarts of the multistart optimization are optimized together with a batched L-BFGS
+                         in one TF graph (only for elementary stationary kernels, see BatchedGPRObjective) - restarts that do not converge
+                         are repeated with the serial optimization
+        n_screening_candidates: number of initial values that are drawn with initial_parameter_strategy and screened by their training loss
+                         before the multistart optimization - only the n_starts best candidates are optimized (0: no screening)
+        warm_start_optimization: bool if the optimization starts from the optimum of the previous inference (multistart initial values are
+                         perturbed around it with warm_start_perturbation) - every cold_restart_every-th inference starts from the initial values (0: never)
     """
 
     def __init__(
@@ -75,6 +90,13 @@ class GPModel(BaseModel):
         n_starts_for_multistart_opt: int,
         expected_observation_noise: float,
         prediction_quantity: PredictionQuantity,
+        warm_start_optimization: bool = False,
+        warm_start_perturbation: float = 0.1,
+        cold_restart_every: int = 0,
+        n_workers_for_multistart_opt: int = 1,
+        multistart_seed: Optional[int] = None,
+        batched_multi_start_optimization: bool = False,
+        n_screening_candidates: int = 0,
         **kwargs,
     ):
         self.kernel = gpflow.utilities.deepcopy(kernel)
@@ -83,6 +105,7 @@ class GPModel(BaseModel):
         self.observation_noise = observation_noise
         self.sample_initial_parameters_at_start = sample_initial_parameters_at_start
         self.model = None
+        self.posterior_cache = GPPosteriorCache()
         self.optimize_hps = optimize_hps
         self.train_likelihood_variance = train_likelihood_variance
         self.use_mean_function = False
@@ -102,6 +125,15 @@ class GPModel(BaseModel):
         self.set_prior_on_observation_noise = set_prior_on_observation_noise
         self.expected_observation_noise = expected_observation_noise
         self.prediction_quantity = prediction_quantity
+        self.warm_start_optimization = warm_start_optimization
+        self.warm_start_perturbation = warm_start_perturbation
+        self.warm_start_parameter_cache = WarmStartParameterCache(cold_restart_every)
+        self.warm_start_active = False
+        self.n_workers_for_multistart_opt = n_workers_for_multistart_opt
+        self.multistart_seed = multistart_seed
+        self.batched_multi_start_optimization = batched_multi_start_optimization
+        self.n_screening_candidates = n_screening_candidates
+        self.screened_parameter_cache = None
         self.print_summaries = True
 
     def set_kernel(self, kernel):
@@ -114,6 +146,7 @@ class GPModel(BaseModel):
         self.kernel = gpflow.utilities.deepcopy(kernel)
         self.kernel_initial_parameter_cache = GPParameterCache()
         self.kernel_initial_parameter_cache.store_parameters_from_model(self.kernel)
+        self.warm_start_parameter_cache.reset()
 
     def get_kernel(self, deep_copy: bool = False):
         if deep_copy:
@@ -185,6 +218,7 @@ class GPModel(BaseModel):
         """
         if self.model is not None:
             self.kernel_initial_parameter_cache.load_parameters_to_model(self.kernel, 0)
+            self.posterior_cache.clear()
             del self.model
 
     def set_mean_function(self, constant: float):
@@ -217,16 +251,68 @@ class GPModel(BaseModel):
         """
         self.build_model(x_data, y_data)
         if self.optimize_hps:
+            self.warm_start_active = self.warm_start_optimization and self.warm_start_parameter_cache.start_inference()
+            if self.warm_start_active:
+                logger.info("Warm start from previous optimum")
+                self.warm_start_parameter_cache.load_optimum_to_model(self.model)
             if self.perform_multi_start_optimization:
                 t0 = time.perf_counter()
                 self.multi_start_optimization(self.n_starts_for_multistart_opt)
                 t1 = time.perf_counter()
-                return t1 - t0
             else:
                 t0 = time.perf_counter()
-                self.optimize()
+                self.optimize(start_from_current_parameters=self.warm_start_active)
                 t1 = time.perf_counter()
-                return t1 - t0
+            if self.warm_start_optimization:
+                self.warm_start_parameter_cache.store_optimum(self.model)
+            self.warm_start_active = False
+            self.update_posterior_cache()
+            return t1 - t0
+        self.update_posterior_cache()
+
+    def condition_on_data(self, x_data: np.array, y_data: np.array):
+        """
+        Conditions the model on a new data set while the hyperparameters are kept fixed - if the current training data are the leading rows
+        of the new data, the cholesky of the gram matrix is extended by the new rows (O(n^2) per new point), otherwise it is refactorized
+
+        Arguments:
+            x_data: Input array with shape (n,d) where d is the input dimension and n the number of training points
+            y_data: Label array with shape (n,1) where n is the number of training points
+
+        Returns:
+            time needed for the update
+        """
+        assert self.model is not None
+        t0 = time.perf_counter()
+        n_old = self.posterior_cache.num_data
+        extend_cache = self.posterior_cache.is_extended_by(x_data, y_data)
+        self.model.data = data_input_to_tensor((x_data, y_data))
+        if extend_cache:
+            x_new, y_new = self.model.data[0][n_old:], self.model.data[1][n_old:]
+            if x_new.shape[0] > 0:
+                self.posterior_cache.extend(
+                    x_new,
+                    y_new,
+                    self.model.kernel(self.posterior_cache.X, x_new),
+                    self._noisy_gram_matrix(x_new),
+                    y_new - self.model.mean_function(x_new)
+                )
+        else:
+            self.update_posterior_cache()
+        t1 = time.perf_counter()
+        return t1 - t0
+
+    def update_posterior_cache(self):
+        """
+        Refactorizes the noisy gram matrix of the training data with the current hyperparameters
+        """
+        X, Y = self.model.data
+        L = tf.linalg.cholesky(self._noisy_gram_matrix(X))
+        self.posterior_cache.set_factors(X, Y, L, Y - self.model.mean_function(X))
+
+    def _noisy_gram_matrix(self, X) -> tf.Tensor:
+        K = self.model.kernel(X)
+        return K + self.model.likelihood.variance * tf.eye(tf.shape(X)[0], dtype=K.dtype)
 
     def build_model(self, x_data: np.array, y_data: np.array):
         """
@@ -237,6 +323,7 @@ class GPModel(BaseModel):
             y_data: Label array with shape (n,1) where n is the number of training points
         """
         assert len(y_data.shape) == 2
+        self.posterior_cache.clear()
 
         if self.use_mean_function:
             self.model = gpflow.models.GPR(
@@ -257,13 +344,16 @@ class GPModel(BaseModel):
         if self.set_prior_on_observation_noise:
             self.model.likelihood.variance.prior = tfd.Exponential(1 / np.power(self.expected_observation_noise, 2.0))
 
-    def optimize(self):
+    def optimize(self, start_from_current_parameters: bool = False):
         """
         Method for performing Type-2 ML infernence - optimization is repeated if convergence was not succesfull or cholesky was not possible
         perturbation of initial values is applied in this case.
         If kernel parameters have prior this method automatically turns to MAP estimation!!
+
+        Arguments:
+            start_from_current_parameters: bool if the first run starts from the current parameters (no initial sampling, e.g. for warm starts)
         """
-        if self.sample_initial_parameters_at_start:
+        if self.sample_initial_parameters_at_start and not start_from_current_parameters:
             self.sample_initial_parameters()
 
         if self.print_summaries:
@@ -308,18 +398,138 @@ class GPModel(BaseModel):
         return self.model.training_loss()
 
     def sample_initial_parameters(self):
-        if self.initial_parameter_strategy == InitialParameters.PERTURB:
+        if self.warm_start_active:
+            self.pertube_parameters(self.warm_start_perturbation)
+        elif self.initial_parameter_strategy == InitialParameters.PERTURB:
             self.pertube_parameters(self.perturbation_factor)
         elif self.initial_parameter_strategy == InitialParameters.UNIFORM_DISTRIBUTION:
             self.parameters_from_uniform_distribution()
+        elif self.initial_parameter_strategy == InitialParameters.SOBOL:
+            sobol = qmc.Sobol(d=self.get_number_of_trainable_parameters(), scramble=True, seed=np.random.randint(2**31 - 1))
+            self.parameters_from_unit_cube(sobol.random(1)[0])
+        elif self.initial_parameter_strategy == InitialParameters.PRIOR_SAMPLES:
+            self.parameters_from_prior()
         else:
             raise ValueError()
 
+    def single_start_optimization(self, start_index: int, seed: int) -> Tuple[float, List[np.array]]:
+        """
+        One run of the multistart optimization - the first run of a warm start begins at the previous optimum
+
+        Arguments:
+            start_index: index of the run
+            seed: seed for sampling the initial values of the run
+
+        Returns:
+            loss after optimization and the trainable parameter values
+        """
+        seed_restart(seed)
+        if self.screened_parameter_cache is not None:
+            self.screened_parameter_cache.load_parameters_to_model(self.model, start_index)
+            self.optimize(start_from_current_parameters=True)
+        else:
+            self.optimize(start_from_current_parameters=self.warm_start_active and start_index == 0)
+        loss = self.training_loss().numpy()
+        return loss, GPParameterCache().get_parameter_numpy_values(self.model)
+
+    def batched_multi_start_optimization_runs(self, seeds: List[int]) -> List[Tuple[float, List[np.array]]]:
+        """
+        Optimizes all restarts of the multistart optimization together - the initial values of restart i are sampled with seeds[i]
+        (same as in single_start_optimization) and all restarts are optimized with one batched L-BFGS. Restarts that do not
+        converge are repeated with single_start_optimization.
+
+        Arguments:
+            seeds: seed for each restart
+
+        Returns:
+            list of (loss, trainable parameter values) of the restarts
+        """
+        objective = BatchedGPRObjective(self.model)
+        random_state = np.random.get_state()
+        try:
+            initial_thetas = []
+            for i, seed in enumerate(seeds):
+                seed_restart(seed)
+                if self.screened_parameter_cache is not None:
+                    self.screened_parameter_cache.load_parameters_to_model(self.model, i)
+                elif not (self.warm_start_active and i == 0):
+                    self.sample_initial_parameters()
+                initial_thetas.append(objective.get_theta())
+            thetas, losses, converged = objective.minimize(np.array(initial_thetas))
+            results = []
+            for i, seed in enumerate(seeds):
+                if converged[i] and np.isfinite(losses[i]):
+                    objective.set_theta(thetas[i])
+                    results.append((losses[i], GPParameterCache().get_parameter_numpy_values(self.model)))
+                else:
+                    logger.warning(f"Batched optimization of run {i+1} did not converge - repeat it with the serial optimization")
+                    objective.set_theta(initial_thetas[i])
+                    results.append(self.single_start_optimization(i, seed))
+            return results
+        finally:
+            np.random.set_state(random_state)
+
+    def screen_initial_parameters(self, n_best: int, seed: int) -> GPParameterCache:
+        """
+        Draws self.n_screening_candidates initial values with the initial_parameter_strategy (one scrambled Sobol sequence for SOBOL)
+        and evaluates their training loss - in one batched pass if the model is supported by BatchedGPRObjective.
+
+        Arguments:
+            n_best: number of candidates that are kept
+            seed: seed for drawing the candidates
+
+        Returns:
+            GPParameterCache with the n_best candidates of lowest loss (sorted by loss)
+        """
+        random_state = np.random.get_state()
+        try:
+            seed_restart(seed)
+            if self.initial_parameter_strategy == InitialParameters.SOBOL:
+                sobol = qmc.Sobol(d=self.get_number_of_trainable_parameters(), scramble=True, seed=seed)
+                unit_samples = sobol.random(self.n_screening_candidates)
+            candidates = GPParameterCache()
+            for i in range(self.n_screening_candidates):
+                if self.initial_parameter_strategy == InitialParameters.SOBOL:
+                    self.parameters_from_unit_cube(unit_samples[i])
+                else:
+                    self.sample_initial_parameters()
+                candidates.store_parameters_from_model(self.model)
+        finally:
+            np.random.set_state(random_state)
+
+        losses = None
+        if BatchedGPRObjective.is_supported(self.model):
+            objective = BatchedGPRObjective(self.model)
+            thetas = []
+            for i in range(self.n_screening_candidates):
+                candidates.load_parameters_to_model(self.model, i)
+                thetas.append(objective.get_theta())
+            try:
+                losses = objective.loss(tf.constant(np.array(thetas))).numpy()
+            except tf.errors.InvalidArgumentError:
+                logger.warning("Cholesky failed in batched screening - evaluate candidates one by one")
+        if losses is None:
+            losses = np.full(self.n_screening_candidates, np.inf)
+            for i in range(self.n_screening_candidates):
+                candidates.load_parameters_to_model(self.model, i)
+                try:
+                    losses[i] = self.training_loss().numpy()
+                except tf.errors.InvalidArgumentError:
+                    pass
+        losses = np.where(np.isfinite(losses), losses, np.inf)
+        screened = GPParameterCache()
+        for index in np.argsort(losses, kind="stable")[:n_best]:
+            screened.parameters_list.append(candidates.parameters_list[index])
+            screened.loss_list.append(losses[index])
+        logger.info(f"Screened {self.n_screening_candidates} initial values - losses of best candidates: {screened.loss_list}")
+        return screened
+
     def multi_start_optimization(self, n_starts: int):
         """
         Method for performing optimization (Type-2 ML) of kernel hps with multiple initial values - self.optimzation method is
         called multiple times and the log_posterior_density (falls back to log_marg_likeli for ML) is collected for all initial values.
-        Model/kernel is set to the trained parameters with largest log_posterior_density
+        Model/kernel is set to the trained parameters with largest log_posterior_density.
+        The runs are distributed over self.n_workers_for_multistart_opt processes if it is larger than 1.
 
         Arguments:
             n_start: number of different initialization/restarts
@@ -331,21 +541,25 @@ class GPModel(BaseModel):
             assert len(self.parameter_cache.parameters_list) == 0
             assert len(self.parameter_cache.loss_list) == 0
             try:
-                opt_time = 0.0
+                time_before_opt = time.perf_counter()
                 self.multi_start_losses = []
-                for i in range(0, n_starts):
-                    logger.info(f"Optimization repeat {i+1}/{n_starts}")
-                    self.optimize()
-                    after_optim = time.perf_counter()
-                    loss = self.training_loss()
-                    self.parameter_cache.store_parameters_from_model(self.model, loss, add_loss_value=True)
+                self.screened_parameter_cache = None
+                if self.n_screening_candidates > n_starts and not self.warm_start_active:
+                    seeds = multi_start_seeds(n_starts + 1, self.multistart_seed)
+                    self.screened_parameter_cache = self.screen_initial_parameters(n_starts, seeds.pop())
+                else:
+                    seeds = multi_start_seeds(n_starts, self.multistart_seed)
+                if self.batched_multi_start_optimization and BatchedGPRObjective.is_supported(self.model):
+                    results = self.batched_multi_start_optimization_runs(seeds)
+                else:
+                    results = run_multi_start_optimization(self, seeds, self.n_workers_for_multistart_opt)
+                for i, (loss, parameter_values) in enumerate(results):
+                    self.parameter_cache.parameters_list.append(parameter_values)
+                    self.parameter_cache.loss_list.append(loss)
                     self.multi_start_losses.append(loss)
-                    after_loss_calc = time.perf_counter()
-                    opt_time += self.get_last_opt_time() + (after_loss_calc - after_optim)
-                    log_marginal_likelihood = -1 * loss
-                    logger.info(f"Log marginal likeli for run: {log_marginal_likelihood}")
+                    logger.info(f"Log marginal likeli for run {i+1}/{n_starts}: {-1 * loss}")
                 self.parameter_cache.load_best_parameters_to_model(self.model)
-                self.last_multi_start_opt_time = opt_time
+                self.last_multi_start_opt_time = time.perf_counter() - time_before_opt
                 logger.debug("Chosen parameter values:")
                 self.print_model_summary()
                 logger.debug(f"Marginal Likelihood of chosen parameters: {self.model.log_posterior_density()}")
@@ -372,19 +586,24 @@ class GPModel(BaseModel):
         """
         if self.model is None and x_data is not None and y_data is not None:
             self.infer(x_data, y_data)
+        if self.posterior_cache.is_valid:
+            return self.posterior_cache.log_marginal_likelihood()
         model_evidence = self.model.log_marginal_likelihood().numpy()
         return model_evidence
 
     def pertube_parameters(self, factor_bound: float):
         """
-        Method for perturbation of the current kernel parameters - internal method that is used before optimization
+        Method for perturbation of the initial kernel parameters (or of the previous optimum for warm starts) - internal method that is used before optimization
 
         Arguments:
             factor_bound: old value is mutliplied with (1+factor) where the factor is random and the factor_bound defines the interval of that variable
         """
-        self.kernel_initial_parameter_cache.load_parameters_to_model(self.model.kernel, 0)
-        if self.train_likelihood_variance:
-            self.model.likelihood.variance.assign(np.power(self.observation_noise, 2.0))
+        if self.warm_start_active:
+            self.warm_start_parameter_cache.load_optimum_to_model(self.model)
+        else:
+            self.kernel_initial_parameter_cache.load_parameters_to_model(self.model.kernel, 0)
+            if self.train_likelihood_variance:
+                self.model.likelihood.variance.assign(np.power(self.observation_noise, 2.0))
         logger.debug("Pertube parameters - parameters before perturbation")
         self.print_model_summary()
         for variable in self.model.trainable_variables:
@@ -396,17 +615,49 @@ class GPModel(BaseModel):
                 new_unconstrained_value = unconstrained_value * factor
             variable.assign(new_unconstrained_value)
 
+    def uniform_bounds(self, parameter: gpflow.Parameter) -> Tuple[float, float]:
+        """
+        bounds of the (constrained) initial values of parameter in UNIFORM_DISTRIBUTION and SOBOL
+        """
+        if parameter.name in ["chain_of_shift_of_softplus", "chain_of_shift_of_exp"]:
+            return 1.000001e-06, self.initial_uniform_upper_bound
+        elif parameter.name == "softplus":
+            return 1e-9, self.initial_uniform_upper_bound
+        return self.initial_uniform_lower_bound, self.initial_uniform_upper_bound
+
     def parameters_from_uniform_distribution(self):
         for parameter in self.model.trainable_parameters:
-            shape = parameter.shape
-            if parameter.name in ["chain_of_shift_of_softplus", "chain_of_shift_of_exp"]:
-                sample = tfd.Uniform(low=1.000001e-06, high=self.initial_uniform_upper_bound).sample(sample_shape=shape)
-            elif parameter.name == "softplus":
-                sample = tfd.Uniform(low=1e-9, high=self.initial_uniform_upper_bound).sample(sample_shape=shape)
-            else:
-                sample = tfd.Uniform(low=self.initial_uniform_lower_bound, high=self.initial_uniform_upper_bound).sample(sample_shape=shape)
+            low, high = self.uniform_bounds(parameter)
+            sample = tfd.Uniform(low=low, high=high).sample(sample_shape=parameter.shape)
             parameter.assign(sample.numpy())
 
+    def parameters_from_unit_cube(self, unit_sample: np.array):
+        """
+        maps a point of the unit cube (e.g. of a Sobol sequence) with one dimension per trainable value to the uniform bounds of the parameters
+        """
+        offset = 0
+        for parameter in self.model.trainable_parameters:
+            size = int(np.prod(parameter.shape))
+            low, high = self.uniform_bounds(parameter)
+            values = low + (high - low) * unit_sample[offset : offset + size]
+            parameter.assign(np.reshape(values, parameter.shape))
+            offset += size
+
+    def parameters_from_prior(self):
+        """
+        samples the trainable parameters from their priors - parameters without prior are sampled uniformly
+        """
+        for parameter in self.model.trainable_parameters:
+            if parameter.prior is None:
+                low, high = self.uniform_bounds(parameter)
+                parameter.assign(np.random.uniform(low, high, size=parameter.shape))
+                continue
+            sample = parameter.prior.sample(sample_shape=parameter.shape if parameter.prior.batch_shape.rank == 0 else ()).numpy()
+            if parameter.prior_on == gpflow.base.PriorOn.CONSTRAINED:
+                parameter.assign(np.reshape(sample, parameter.shape))
+            else:
+                parameter.unconstrained_variable.assign(np.reshape(sample, parameter.shape))
+
     def get_number_of_trainable_parameters(self):
         total_number = 0
         for variable in self.model.trainable_variables:
@@ -424,10 +675,7 @@ class GPModel(BaseModel):
         mean array with shape (n,)
         sigma array with shape (n,)
         """
-        if self.prediction_quantity == PredictionQuantity.PREDICT_F:
-            pred_mus, pred_vars = self.model.predict_f(x_test)
-        elif self.prediction_quantity == PredictionQuantity.PREDICT_Y:
-            pred_mus, pred_vars = self.model.predict_y(x_test)
+        pred_mus, pred_vars = self._predict(x_test)
         pred_sigmas = np.sqrt(pred_vars)
         return np.squeeze(pred_mus), np.squeeze(pred_sigmas)
 
@@ -443,7 +691,7 @@ class GPModel(BaseModel):
         Returns:
         array of shape (n,) with log liklihood values
         """
-        pred_mus, pred_vars = self.model.predict_y(x_test)
+        pred_mus, pred_vars = self._predict(x_test, prediction_quantity=PredictionQuantity.PREDICT_Y)
         pred_sigmas = np.sqrt(pred_vars)
         log_likelis = norm.logpdf(np.squeeze(y_test), np.squeeze(pred_mus), np.squeeze(pred_sigmas))
         return log_likelis
@@ -459,10 +707,7 @@ class GPModel(BaseModel):
         mean array with shape (n,)
         sigma array with shape (n,n)
         """
-        if self.prediction_quantity == PredictionQuantity.PREDICT_F:
-            pred_mus, pred_cov = self.model.predict_f(x_test, full_cov=True)
-        elif self.prediction_quantity == PredictionQuantity.PREDICT_Y:
-            pred_mus, pred_cov = self.model.predict_y(x_test, full_cov=True)
+        pred_mus, pred_cov = self._predict(x_test, full_cov=True)
         return np.squeeze(pred_mus), np.squeeze(pred_cov)
 
     def entropy_predictive_dist(self, x_test: np.array) -> np.array:
@@ -475,14 +720,37 @@ class GPModel(BaseModel):
         Returns:
         entropy array with shape (n,1)
         """
-        if self.prediction_quantity == PredictionQuantity.PREDICT_F:
-            pred_mus, pred_vars = self.model.predict_f(x_test)
-        elif self.prediction_quantity == PredictionQuantity.PREDICT_Y:
-            pred_mus, pred_vars = self.model.predict_y(x_test)
+        pred_mus, pred_vars = self._predict(x_test)
         pred_sigmas = np.sqrt(pred_vars)
         entropies = normal_entropy(pred_sigmas)
         return entropies
 
+    def _predict(self, x_test: np.array, full_cov: bool = False, prediction_quantity: Optional[PredictionQuantity] = None):
+        """
+        predictive mean and variance (covariance if full_cov) of f or y, depending on prediction_quantity
+        (default self.prediction_quantity) - uses the posterior cache if it is available
+        """
+        if prediction_quantity is None:
+            prediction_quantity = self.prediction_quantity
+        if not self.posterior_cache.is_valid:
+            if prediction_quantity == PredictionQuantity.PREDICT_F:
+                return self.model.predict_f(x_test, full_cov=full_cov)
+            elif prediction_quantity == PredictionQuantity.PREDICT_Y:
+                return self.model.predict_y(x_test, full_cov=full_cov)
+        x_test = tf.convert_to_tensor(x_test, dtype=self.posterior_cache.X.dtype)
+        f_mean, f_var = self.posterior_cache.predict_f(
+            self.model.kernel(self.posterior_cache.X, x_test),
+            self.model.kernel(x_test, full_cov=full_cov),
+            full_cov=full_cov
+        )
+        f_mean = f_mean + self.model.mean_function(x_test)
+        if prediction_quantity == PredictionQuantity.PREDICT_Y:
+            if full_cov:
+                f_var = f_var + self.model.likelihood.variance * tf.eye(tf.shape(x_test)[0], dtype=f_var.dtype)
+            else:
+                f_var = f_var + self.model.likelihood.variance
+        return f_mean, f_var
+
     def calculate_complete_information_gain(self, x_data: np.array) -> np.float:
         n = x_data.shape[0]
         gram_matrix = self.model.kernel.K(x_data)
@@ -148,6 +148,16 @@ class MetaGPModel(BaseModel):
             self.meta_trained = True
             return t1 - t0
         
+    def condition_on_data(self, x_data: np.array, y_data: np.array):
+        """
+        Sets the context data of the meta learned model - the model is only meta trained if this was not done before
+
+        Arguments:
+            x_data: Input array with shape (n,d+1) where d is the input dimension and n the number of training points
+            y_data: Label array with shape (n,1) where n is the number of training points
+        """
+        return self.infer(x_data, y_data)
+
     def estimate_model_evidence(self, x_data: Optional[np.array] = None, y_data: Optional[np.array] = None) -> float:
         """
         Estimates the model evidence - always retrieves marg likelihood, also when HPs are provided with prior!!
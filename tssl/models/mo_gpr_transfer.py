@@ -71,6 +71,9 @@ class TransferGPR(GPModel, InternalDataTrainingLossMixin):
         self.__empty_target = (np.shape(data[0])[0] == 0)
         self.Ls = None
     
+    def set_empty_target(self, empty_target: bool):
+        self.__empty_target = empty_target
+
     def compute_source_cholesky(self):
         Xs, Ys = self.source_data
         noise = tf.linalg.diag(
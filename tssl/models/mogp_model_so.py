@@ -28,9 +28,12 @@ import tensorflow as tf
 from tensorflow_probability import distributions as tfd
 import gpflow
 from gpflow.utilities import print_summary, set_trainable
+from gpflow.models.util import data_input_to_tensor
 from scipy.stats import norm
 
-from tssl.utils.gp_paramater_cache import GPParameterCache
+from tssl.utils.gp_paramater_cache import GPParameterCache, WarmStartParameterCache
+from tssl.utils.gp_posterior_cache import GPPosteriorCache
+from tssl.utils.model_fit_executors import multi_start_seeds, seed_restart, run_multi_start_optimization
 from tssl.models.base_model import BaseModel
 from tssl.models.mo_gpr_so import SOMOGPR
 from tssl.kernels.multi_output_kernels.base_multioutput_flattened_kernel import BaseMultioutputFlattenedKernel
@@ -55,6 +58,11 @@ class SOMOGPModel(BaseModel):
         n_starts_for_multistart_opt: int = 5,
         set_prior_on_observation_noise=False,
         prediction_quantity: PredictionQuantity = PredictionQuantity.PREDICT_F,
+        warm_start_optimization: bool = False,
+        warm_start_perturbation: float = 0.1,
+        cold_restart_every: int = 0,
+        n_workers_for_multistart_opt: int = 1,
+        multistart_seed: Optional[int] = None,
         **kwargs
     ):
         self.kernel = kernel
@@ -62,6 +70,7 @@ class SOMOGPModel(BaseModel):
         self.observation_noise = observation_noise
         self.expected_observation_noise = expected_observation_noise
         self.model = None
+        self.posterior_cache = GPPosteriorCache()
         self.optimize_hps = optimize_hps
         self.train_likelihood_variance = train_likelihood_variance
         self.use_mean_function = False
@@ -72,6 +81,12 @@ class SOMOGPModel(BaseModel):
         self.n_starts_for_multistart_opt = n_starts_for_multistart_opt
         self.set_prior_on_observation_noise = set_prior_on_observation_noise
         self.prediction_quantity = prediction_quantity
+        self.warm_start_optimization = warm_start_optimization
+        self.warm_start_perturbation = warm_start_perturbation
+        self.warm_start_parameter_cache = WarmStartParameterCache(cold_restart_every)
+        self.warm_start_active = False
+        self.n_workers_for_multistart_opt = n_workers_for_multistart_opt
+        self.multistart_seed = multistart_seed
         self.print_summaries = False
 
     def assign_likelihood_variance(self):
@@ -89,6 +104,7 @@ class SOMOGPModel(BaseModel):
         """
         if self.model is not None:
             self.kernel = gpflow.utilities.deepcopy(self.kernel_copy)
+            self.posterior_cache.clear()
             del self.model
 
     def set_mean_function(self, constant: float):
@@ -121,6 +137,7 @@ class SOMOGPModel(BaseModel):
         """
         yy = y_data
         yy = np.hstack((yy[..., :1], x_data[..., -1, None]))
+        self.posterior_cache.clear()
         model = SOMOGPR
         if self.use_mean_function:
             self.model = model(data=(x_data, yy), kernel=self.kernel, mean_function=self.mean_function, noise_variance=np.power(self.observation_noise, 2.0))
@@ -136,16 +153,71 @@ class SOMOGPModel(BaseModel):
                 lik.variance.prior = tfd.Exponential(1 / np.power(self.expected_observation_noise, 2.0))
         
         if self.optimize_hps:
+            self.warm_start_active = self.warm_start_optimization and self.warm_start_parameter_cache.start_inference()
+            if self.warm_start_active:
+                logger.info("Warm start from previous optimum")
+                self.warm_start_parameter_cache.load_optimum_to_model(self.model)
             if self.perform_multi_start_optimization:
-                self.optimize(self.pertube_parameters_at_start, self.pertubation_at_start)
+                if not self.warm_start_active:
+                    self.optimize(self.pertube_parameters_at_start, self.pertubation_at_start)
                 t0 = time.perf_counter()
                 self.multi_start_optimization(self.n_starts_for_multistart_opt, self.pertubation_for_multistart_opt)
                 t1 = time.perf_counter()
             else:
                 t0 = time.perf_counter()
-                self.optimize(self.pertube_parameters_at_start, self.pertubation_at_start)
+                self.optimize(self.pertube_parameters_at_start and not self.warm_start_active, self.pertubation_at_start)
                 t1 = time.perf_counter()
+            if self.warm_start_optimization:
+                self.warm_start_parameter_cache.store_optimum(self.model)
+            self.warm_start_active = False
+            self.update_posterior_cache()
             return t1 - t0
+        self.update_posterior_cache()
+
+    def condition_on_data(self, x_data: np.array, y_data: np.array):
+        """
+        Conditions the model on a new data set while the hyperparameters are kept fixed - if the current training data are the leading rows
+        of the new data, the cholesky of the gram matrix is extended by the new rows (O(n^2) per new point), otherwise it is refactorized
+
+        Arguments:
+            x_data: Input array with shape (n,d+1) where d is the input dimension and n the number of training points
+            y_data: Label array with shape (n,1) where n is the number of training points
+
+        Returns:
+            time needed for the update
+        """
+        assert self.model is not None
+        t0 = time.perf_counter()
+        yy = np.hstack((y_data[..., :1], x_data[..., -1, None]))
+        n_old = self.posterior_cache.num_data
+        extend_cache = self.posterior_cache.is_extended_by(x_data, yy)
+        self.model.data = data_input_to_tensor((x_data, yy))
+        if extend_cache:
+            x_new, y_new = self.model.data[0][n_old:], self.model.data[1][n_old:]
+            if x_new.shape[0] > 0:
+                self.posterior_cache.extend(
+                    x_new,
+                    y_new,
+                    self.model.kernel(self.posterior_cache.X, x_new),
+                    self._noisy_gram_matrix(x_new, y_new),
+                    y_new[..., :1] - self.model.mean_function(x_new)
+                )
+        else:
+            self.update_posterior_cache()
+        t1 = time.perf_counter()
+        return t1 - t0
+
+    def update_posterior_cache(self):
+        """
+        Refactorizes the noisy gram matrix of the training data with the current hyperparameters
+        """
+        X, Y = self.model.data
+        L = tf.linalg.cholesky(self._noisy_gram_matrix(X, Y))
+        self.posterior_cache.set_factors(X, Y, L, Y[..., :1] - self.model.mean_function(X))
+
+    def _noisy_gram_matrix(self, X, Y) -> tf.Tensor:
+        s_diag = tf.reshape(self.model.likelihood._partition_and_stitch([Y], '_conditional_variance'), [-1])
+        return self.model.kernel(X) + tf.linalg.diag(s_diag)
 
     def optimize(self, pertube_initial_parameters: bool, pertubation_factor=0.2):
         """
@@ -188,6 +260,23 @@ class SOMOGPModel(BaseModel):
         if logger.isEnabledFor(logging.DEBUG):
             print_summary(self.model)
     
+    def single_start_optimization(self, start_index: int, seed: int, pertubation_factor: float) -> Tuple[float, List[np.array]]:
+        """
+        One run of the multistart optimization - the first run of a warm start begins at the previous optimum
+
+        Arguments:
+            start_index: index of the run
+            seed: seed for the pertubation of the initial values of the run
+            pertubation_factor: factor how much the initial_values should be pertubed
+
+        Returns:
+            loss after optimization and the trainable parameter values
+        """
+        seed_restart(seed)
+        self.optimize(not (self.warm_start_active and start_index == 0), pertubation_factor)
+        loss = self.training_loss().numpy()
+        return loss, GPParameterCache().get_parameter_numpy_values(self.model)
+
     def multi_start_optimization(self, n_starts: int, pertubation_factor: float):
         """
         Method for performing optimization (Type-2 ML) of kernel hps with multiple initial values - self.optimzation method is
@@ -197,6 +286,8 @@ class SOMOGPModel(BaseModel):
         Arguments:
             n_start: number of different initialization/restarts
             pertubation_factor: factor how much the initial_values should be pertubed in each restart
+
+        The runs are distributed over self.n_workers_for_multistart_opt processes if it is larger than 1.
         """
         optimization_success = False
         self.parameter_cache = GPParameterCache()
@@ -205,17 +296,22 @@ class SOMOGPModel(BaseModel):
             assert len(self.parameter_cache.parameters_list) == 0
             assert len(self.parameter_cache.loss_list) == 0
             try:
-                if self.pertube_parameters_at_start:
+                if self.warm_start_active:
+                    # first run from the previous optimum, the others perturbed around it
+                    self.warm_start_parameter_cache.load_optimum_to_model(self.model)
+                    pertubation_factor = self.warm_start_perturbation
+                elif self.pertube_parameters_at_start:
                     self.pertube_parameters(self.pertubation_at_start)
                 self.multi_start_losses = []
-                for i in range(0, n_starts):
-                    logger.info(f"Optimization repeat {i+1}/{n_starts}")
-                    self.optimize(True, pertubation_factor)
-                    loss = self.training_loss()
-                    self.parameter_cache.store_parameters_from_model(self.model, loss, add_loss_value=True)
+                seeds = multi_start_seeds(n_starts, self.multistart_seed)
+                results = run_multi_start_optimization(
+                    self, seeds, self.n_workers_for_multistart_opt, pertubation_factor=pertubation_factor
+                )
+                for i, (loss, parameter_values) in enumerate(results):
+                    self.parameter_cache.parameters_list.append(parameter_values)
+                    self.parameter_cache.loss_list.append(loss)
                     self.multi_start_losses.append(loss)
-                    log_marginal_likelihood = -1 * loss
-                    logger.info(f"Log marginal likeli for run: {log_marginal_likelihood}")
+                    logger.info(f"Log marginal likeli for run {i+1}/{n_starts}: {-1 * loss}")
                 self.parameter_cache.load_best_parameters_to_model(self.model)
                 logger.debug("Chosen parameter values:")
                 self.print_model_summary()
@@ -239,19 +335,24 @@ class SOMOGPModel(BaseModel):
         """
         if self.model is None and x_data is not None and y_data is not None:
             self.infer(x_data, y_data)
+        if self.posterior_cache.is_valid:
+            return self.posterior_cache.log_marginal_likelihood()
         model_evidence = self.model.log_marginal_likelihood().numpy()
         return model_evidence
 
     def pertube_parameters(self, factor_bound: float):
         """
-        Method for pertubation of the current kernel parameters - internal method that is used before optimization
+        Method for pertubation of the initial kernel parameters (or of the previous optimum for warm starts) - internal method that is used before optimization
 
         Arguments:
             factor_bound: old value is mutliplied with (1+factor) where the factor is random and the factor_bound defines the interval of that variable
         """
-        self.model.kernel = gpflow.utilities.deepcopy(self.kernel_copy)
-        if self.train_likelihood_variance:
-            self.assign_likelihood_variance()
+        if self.warm_start_active:
+            self.warm_start_parameter_cache.load_optimum_to_model(self.model)
+        else:
+            self.model.kernel = gpflow.utilities.deepcopy(self.kernel_copy)
+            if self.train_likelihood_variance:
+                self.assign_likelihood_variance()
         for variable in self.model.trainable_variables:
             unconstrained_value = variable.numpy()
             factor = 1 + np.random.uniform(-1 * factor_bound, factor_bound, size=unconstrained_value.shape)
@@ -259,7 +360,8 @@ class SOMOGPModel(BaseModel):
                 new_unconstrained_value = (unconstrained_value + np.random.normal(0, 0.05, size=unconstrained_value.shape)) * factor
             else:
                 new_unconstrained_value = unconstrained_value * factor
-            new_unconstrained_value = np.random.uniform(-10, 10, size=unconstrained_value.shape)
+            if not self.warm_start_active:
+                new_unconstrained_value = np.random.uniform(-10, 10, size=unconstrained_value.shape)
             variable.assign(new_unconstrained_value)
 
     def predictive_dist(self, x_test: np.array) -> Tuple[np.array, np.array]:
@@ -273,13 +375,32 @@ class SOMOGPModel(BaseModel):
         mean array with shape (n,m)
         sigma array with shape (n,m)
         """
-        if self.prediction_quantity == PredictionQuantity.PREDICT_F:
-            pred_mus, pred_vars = self.model.predict_f(x_test)
-        elif self.prediction_quantity == PredictionQuantity.PREDICT_Y:
-            pred_mus, pred_vars = self.model.predict_y(x_test)
+        pred_mus, pred_vars = self._predict(x_test)
         pred_sigmas = np.sqrt(pred_vars)
         return np.squeeze(pred_mus), np.squeeze(pred_sigmas)
 
+    def _predict(self, x_test: np.array, prediction_quantity: Optional[PredictionQuantity] = None):
+        """
+        predictive mean and variance of f or y, depending on prediction_quantity (default self.prediction_quantity) -
+        uses the posterior cache if it is available
+        """
+        if prediction_quantity is None:
+            prediction_quantity = self.prediction_quantity
+        if not self.posterior_cache.is_valid:
+            if prediction_quantity == PredictionQuantity.PREDICT_F:
+                return self.model.predict_f(x_test)
+            elif prediction_quantity == PredictionQuantity.PREDICT_Y:
+                return self.model.predict_y(x_test)
+        x_test = tf.convert_to_tensor(x_test, dtype=self.posterior_cache.X.dtype)
+        f_mean, f_var = self.posterior_cache.predict_f(
+            self.model.kernel(self.posterior_cache.X, x_test),
+            self.model.kernel(x_test, full_cov=False)
+        )
+        f_mean = f_mean + self.model.mean_function(x_test)
+        if prediction_quantity == PredictionQuantity.PREDICT_Y:
+            f_var = f_var + self.model.likelihood._partition_and_stitch([x_test[..., -2:]], '_conditional_variance')
+        return f_mean, f_var
+
     def entropy_predictive_dist(self, x_test: np.array) -> np.array:
         """
         Method for calculating the entropy of the predictive distribution for test sequence - used for acquistion function in active learning
@@ -313,7 +434,7 @@ class SOMOGPModel(BaseModel):
         Returns:
         array of shape (n,) with log liklihood values
         """
-        pred_mus, pred_vars = self.model.predict_y(x_test)
+        pred_mus, pred_vars = self._predict(x_test, prediction_quantity=PredictionQuantity.PREDICT_Y)
         pred_sigmas = np.sqrt(pred_vars)
         log_likelis = norm.logpdf(np.squeeze(y_test), np.squeeze(pred_mus), np.squeeze(pred_sigmas))
         return log_likelis
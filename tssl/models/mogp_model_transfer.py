@@ -29,9 +29,12 @@ import tensorflow as tf
 from tensorflow_probability import distributions as tfd
 import gpflow
 from gpflow.utilities import print_summary, set_trainable
+from gpflow.models.util import data_input_to_tensor
 from scipy.stats import norm
 
-from tssl.utils.gp_paramater_cache import GPParameterCache
+from tssl.utils.gp_paramater_cache import GPParameterCache, WarmStartParameterCache
+from tssl.utils.gp_posterior_cache import GPPosteriorCache
+from tssl.utils.model_fit_executors import multi_start_seeds, seed_restart, run_multi_start_optimization
 from tssl.models.base_model import BaseModel
 from tssl.models.mo_gpr_transfer import TransferGPR
 from tssl.kernels.multi_output_kernels.base_transfer_kernel import BaseTransferKernel
@@ -40,6 +43,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+f64 = gpflow.utilities.to_default_float
+
 
 class SourceTraining(Enum):
     WITHOUT_TARGET = 0
@@ -63,6 +68,11 @@ class TransferGPModel(BaseModel):
         n_starts_for_multistart_opt: int = 5,
         set_prior_on_observation_noise=False,
         prediction_quantity: PredictionQuantity = PredictionQuantity.PREDICT_F,
+        warm_start_optimization: bool = False,
+        warm_start_perturbation: float = 0.1,
+        cold_restart_every: int = 0,
+        n_workers_for_multistart_opt: int = 1,
+        multistart_seed: Optional[int] = None,
         **kwargs
     ):
         self.kernel = kernel
@@ -75,6 +85,7 @@ class TransferGPModel(BaseModel):
         self.observation_noise = observation_noise
         self.expected_observation_noise = expected_observation_noise
         self.model = None
+        self.posterior_cache = GPPosteriorCache()
         self.optimize_hps = optimize_hps
         self.train_likelihood_variance = train_likelihood_variance
         self.source_training_mode = source_training_mode
@@ -86,6 +97,12 @@ class TransferGPModel(BaseModel):
         self.n_starts_for_multistart_opt = n_starts_for_multistart_opt
         self.set_prior_on_observation_noise = set_prior_on_observation_noise
         self.prediction_quantity = prediction_quantity
+        self.warm_start_optimization = warm_start_optimization
+        self.warm_start_perturbation = warm_start_perturbation
+        self.warm_start_parameter_cache = WarmStartParameterCache(cold_restart_every)
+        self.warm_start_active = False
+        self.n_workers_for_multistart_opt = n_workers_for_multistart_opt
+        self.multistart_seed = multistart_seed
         self.print_summaries = False
 
     def assign_likelihood_variance(self):
@@ -109,8 +126,10 @@ class TransferGPModel(BaseModel):
         resets the model to the initial values - kernel parameters and observation noise are reset to initial values - gpflow model is deleted
         """
         if self.model is not None:
+            self.posterior_cache.clear()
             if reset_source:
                 self.kernel = gpflow.utilities.deepcopy(self.kernel_copy)
+                self.warm_start_parameter_cache.reset()
                 self.source_trained = False
                 self.source_data = None
                 del self.model
@@ -143,6 +162,7 @@ class TransferGPModel(BaseModel):
         t = self.kernel.output_dimension - 1
         t_mask = x_data[:,-1] == t
         likelihood_vars = np.power(self.observation_noise, 2.0)
+        self.posterior_cache.clear()
         model = TransferGPR
         if self.use_mean_function:
             self.model = model(source_data=(x_data[~t_mask], yy[~t_mask]), data=(x_data[t_mask], yy[t_mask]), kernel=self.kernel, mean_function=self.mean_function, noise_variance=np.power(self.observation_noise, 2.0))
@@ -212,6 +232,8 @@ class TransferGPModel(BaseModel):
             self.kernel_on_source = gpflow.utilities.deepcopy(self.model.kernel)
             self.likelihood_vars_on_source = [lik.variance.numpy() for lik in self.model.likelihood.likelihoods]
             self.cholesky_on_source = self.model.compute_source_cholesky()
+            # optima of the target parameters belong to the previous source model
+            self.warm_start_parameter_cache.reset()
 
             self.model.set_source_cholesky(self.cholesky_on_source)
         
@@ -233,21 +255,98 @@ class TransferGPModel(BaseModel):
             t_opt_source = self._infer_and_set_source()
         if tf.shape(self.model.data[0])[0] == 0:
             print('no target data')
+            self.update_posterior_cache()
             return t_opt_source
         
         if self.optimize_hps:
+            self.warm_start_active = self.warm_start_optimization and self.warm_start_parameter_cache.start_inference()
+            if self.warm_start_active:
+                logger.info("Warm start from previous optimum")
+                self.warm_start_parameter_cache.load_optimum_to_model(self.model)
             if self.perform_multi_start_optimization:
-                self.optimize(self.pertube_parameters_at_start, self.pertubation_at_start)
+                if not self.warm_start_active:
+                    self.optimize(self.pertube_parameters_at_start, self.pertubation_at_start)
                 t0 = time.perf_counter()
                 self.multi_start_optimization(self.n_starts_for_multistart_opt, self.pertubation_for_multistart_opt)
                 t1 = time.perf_counter()
             else:
                 t0 = time.perf_counter()
-                self.optimize(self.pertube_parameters_at_start, self.pertubation_at_start)
+                self.optimize(self.pertube_parameters_at_start and not self.warm_start_active, self.pertubation_at_start)
                 t1 = time.perf_counter()
+            if self.warm_start_optimization:
+                self.warm_start_parameter_cache.store_optimum(self.model)
+            self.warm_start_active = False
+            self.update_posterior_cache()
             return t1 - t0 + t_opt_source
+        self.update_posterior_cache()
         return t_opt_source
 
+    def condition_on_data(self, x_data: np.array, y_data: np.array):
+        """
+        Conditions the model on a new data set while the hyperparameters are kept fixed - if the source data are unchanged and the current
+        target data are the leading target rows of the new data, the joint cholesky is extended by the new target rows (O(n^2) per new point),
+        otherwise it is refactorized (the source model is retrained if the source data changed)
+
+        Arguments:
+            x_data: Input array with shape (n,d+1) where d is the input dimension and n the number of training points
+            y_data: Label array with shape (n,1) where n is the number of training points
+
+        Returns:
+            time needed for the update
+        """
+        assert self.model is not None
+        yy = np.hstack((y_data[..., :1], x_data[..., -1, None]))
+        t = self.kernel.output_dimension - 1
+        t_mask = x_data[:,-1] == t
+        Xs, Ys = self.model.source_data
+        if not self.source_trained or not (
+            np.array_equal(x_data[~t_mask], Xs.numpy()) and np.array_equal(yy[~t_mask], Ys.numpy())
+        ):
+            logger.info("Source data changed - infer the model")
+            self.reset_model()
+            return self.infer(x_data, y_data)
+
+        t0 = time.perf_counter()
+        X = np.vstack((x_data[~t_mask], x_data[t_mask]))
+        Y = np.vstack((yy[~t_mask], yy[t_mask]))
+        n_old = self.posterior_cache.num_data
+        extend_cache = self.posterior_cache.is_extended_by(X, Y)
+        self.model.data = data_input_to_tensor((x_data[t_mask], yy[t_mask]))
+        self.model.set_empty_target(np.sum(t_mask) == 0)
+        if extend_cache:
+            x_new, y_new = f64(X[n_old:]), f64(Y[n_old:])
+            if x_new.shape[0] > 0:
+                self.posterior_cache.extend(
+                    x_new,
+                    y_new,
+                    self.model.kernel(self.posterior_cache.X, x_new),
+                    self._noisy_gram_matrix(x_new, y_new),
+                    y_new[..., :1] - self.model.mean_function(x_new)
+                )
+        else:
+            self.update_posterior_cache()
+        t1 = time.perf_counter()
+        return t1 - t0
+
+    def update_posterior_cache(self):
+        """
+        Computes the joint cholesky of source and target data with the current hyperparameters (the frozen source block is reused)
+        """
+        Xs, Ys = self.model.source_data
+        Xt, Yt = self.model.data
+        Ls = self.model.compute_source_cholesky() if self.model.Ls is None else self.model.Ls
+        if Xt.shape[0] == 0:
+            L = Ls
+        else:
+            L = self.model.full_gram_noisy_cholesky(Xs, Xt, Ls)
+        X = tf.concat([Xs, Xt], axis=0)
+        Y = tf.concat([Ys, Yt], axis=0)
+        self.posterior_cache.set_factors(X, Y, L, Y[..., :1] - self.model.mean_function(X))
+
+    def _noisy_gram_matrix(self, X, Y) -> tf.Tensor:
+        s_diag = tf.reshape(self.model.likelihood._partition_and_stitch([Y], '_conditional_variance'), [-1])
+        return self.model.kernel(X) + tf.linalg.diag(s_diag)
+
     def optimize(self, pertube_initial_parameters: bool, pertubation_factor=0.2):
         """
         Method for performing Type-2 ML infernence - optimization is repeated if convergence was not succesfull or cholesky was not possible
@@ -289,6 +388,23 @@ class TransferGPModel(BaseModel):
         if logger.isEnabledFor(logging.DEBUG):
             print_summary(self.model)
     
+    def single_start_optimization(self, start_index: int, seed: int, pertubation_factor: float) -> Tuple[float, List[np.array]]:
+        """
+        One run of the multistart optimization - the first run of a warm start begins at the previous optimum
+
+        Arguments:
+            start_index: index of the run
+            seed: seed for the pertubation of the initial values of the run
+            pertubation_factor: factor how much the initial_values should be pertubed
+
+        Returns:
+            loss after optimization and the trainable parameter values
+        """
+        seed_restart(seed)
+        self.optimize(not (self.warm_start_active and start_index == 0), pertubation_factor)
+        loss = self.training_loss().numpy()
+        return loss, GPParameterCache().get_parameter_numpy_values(self.model)
+
     def multi_start_optimization(self, n_starts: int, pertubation_factor: float):
         """
         Method for performing optimization (Type-2 ML) of kernel hps with multiple initial values - self.optimzation method is
@@ -298,6 +414,8 @@ class TransferGPModel(BaseModel):
         Arguments:
             n_start: number of different initialization/restarts
             pertubation_factor: factor how much the initial_values should be pertubed in each restart
+
+        The runs are distributed over self.n_workers_for_multistart_opt processes if it is larger than 1.
         """
         optimization_success = False
         self.parameter_cache = GPParameterCache()
@@ -306,17 +424,22 @@ class TransferGPModel(BaseModel):
             assert len(self.parameter_cache.parameters_list) == 0
             assert len(self.parameter_cache.loss_list) == 0
             try:
-                if self.pertube_parameters_at_start:
+                if self.warm_start_active:
+                    # first run from the previous optimum, the others perturbed around it
+                    self.warm_start_parameter_cache.load_optimum_to_model(self.model)
+                    pertubation_factor = self.warm_start_perturbation
+                elif self.pertube_parameters_at_start:
                     self.pertube_parameters(self.pertubation_at_start)
                 self.multi_start_losses = []
-                for i in range(0, n_starts):
-                    logger.info(f"Optimization repeat {i+1}/{n_starts}")
-                    self.optimize(True, pertubation_factor)
-                    loss = self.training_loss()
-                    self.parameter_cache.store_parameters_from_model(self.model, loss, add_loss_value=True)
+                seeds = multi_start_seeds(n_starts, self.multistart_seed)
+                results = run_multi_start_optimization(
+                    self, seeds, self.n_workers_for_multistart_opt, pertubation_factor=pertubation_factor
+                )
+                for i, (loss, parameter_values) in enumerate(results):
+                    self.parameter_cache.parameters_list.append(parameter_values)
+                    self.parameter_cache.loss_list.append(loss)
                     self.multi_start_losses.append(loss)
-                    log_marginal_likelihood = -1 * loss
-                    logger.info(f"Log marginal likeli for run: {log_marginal_likelihood}")
+                    logger.info(f"Log marginal likeli for run {i+1}/{n_starts}: {-1 * loss}")
                 self.parameter_cache.load_best_parameters_to_model(self.model)
                 logger.debug("Chosen parameter values:")
                 self.print_model_summary()
@@ -340,17 +463,21 @@ class TransferGPModel(BaseModel):
         """
         if self.model is None and x_data is not None and y_data is not None:
             self.infer(x_data, y_data)
+        if self.posterior_cache.is_valid:
+            return self.posterior_cache.log_marginal_likelihood()
         model_evidence = self.model.log_marginal_likelihood().numpy()
         return model_evidence
 
     def pertube_parameters(self, factor_bound: float):
         """
-        Method for pertubation of the current kernel parameters - internal method that is used before optimization
+        Method for pertubation of the initial kernel parameters (or of the previous optimum for warm starts) - internal method that is used before optimization
 
         Arguments:
             factor_bound: old value is mutliplied with (1+factor) where the factor is random and the factor_bound defines the interval of that variable
         """
-        if self.source_trained:
+        if self.warm_start_active:
+            self.warm_start_parameter_cache.load_optimum_to_model(self.model)
+        elif self.source_trained:
             self._set_source()
         else:
             self.model.kernel = gpflow.utilities.deepcopy(self.kernel_copy)
@@ -385,13 +512,32 @@ class TransferGPModel(BaseModel):
         mean array with shape (n,m)
         sigma array with shape (n,m)
         """
-        if self.prediction_quantity == PredictionQuantity.PREDICT_F:
-            pred_mus, pred_vars = self.model.predict_f(x_test)
-        elif self.prediction_quantity == PredictionQuantity.PREDICT_Y:
-            pred_mus, pred_vars = self.model.predict_y(x_test)
+        pred_mus, pred_vars = self._predict(x_test)
         pred_sigmas = np.sqrt(pred_vars)
         return np.squeeze(pred_mus), np.squeeze(pred_sigmas)
 
+    def _predict(self, x_test: np.array, prediction_quantity: Optional[PredictionQuantity] = None):
+        """
+        predictive mean and variance of f or y, depending on prediction_quantity (default self.prediction_quantity) -
+        uses the posterior cache if it is available
+        """
+        if prediction_quantity is None:
+            prediction_quantity = self.prediction_quantity
+        if not self.posterior_cache.is_valid:
+            if prediction_quantity == PredictionQuantity.PREDICT_F:
+                return self.model.predict_f(x_test)
+            elif prediction_quantity == PredictionQuantity.PREDICT_Y:
+                return self.model.predict_y(x_test)
+        x_test = tf.convert_to_tensor(x_test, dtype=self.posterior_cache.X.dtype)
+        f_mean, f_var = self.posterior_cache.predict_f(
+            self.model.kernel(self.posterior_cache.X, x_test),
+            self.model.kernel(x_test, full_cov=False)
+        )
+        f_mean = f_mean + self.model.mean_function(x_test)
+        if prediction_quantity == PredictionQuantity.PREDICT_Y:
+            f_var = f_var + self.model.likelihood._partition_and_stitch([x_test[..., -2:]], '_conditional_variance')
+        return f_mean, f_var
+
     def entropy_predictive_dist(self, x_test: np.array) -> np.array:
         """
         Method for calculating the entropy of the predictive distribution for test sequence - used for acquistion function in active learning
@@ -425,7 +571,7 @@ class TransferGPModel(BaseModel):
         Returns:
         array of shape (n,) with log liklihood values
         """
-        pred_mus, pred_vars = self.model.predict_y(x_test)
+        pred_mus, pred_vars = self._predict(x_test, prediction_quantity=PredictionQuantity.PREDICT_Y)
         pred_sigmas = np.sqrt(pred_vars)
         log_likelis = norm.logpdf(np.squeeze(y_test), np.squeeze(pred_mus), np.squeeze(pred_sigmas))
         return log_likelis
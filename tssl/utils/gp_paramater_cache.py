@@ -85,3 +85,39 @@ class GPParameterCache:
     def clear(self):
         self.parameters_list = []
         self.loss_list = []
+
+
+class WarmStartParameterCache(GPParameterCache):
+    """
+    Keeps the optimized trainable parameters of the last inference, such that the next hyperparameter optimization
+    can start from there (and multistart initial values are perturbed around them) instead of the initial parameters.
+    With cold_restart_every=k, every k-th inference starts cold, i.e. from the initial parameters as before.
+    """
+
+    def __init__(self, cold_restart_every: int = 0):
+        super().__init__()
+        self.cold_restart_every = cold_restart_every
+        self.n_inferences = 0
+
+    @property
+    def has_parameters(self) -> bool:
+        return len(self.parameters_list) > 0
+
+    def start_inference(self) -> bool:
+        """
+        has to be called once per inference - returns True if the inference should be warm started
+        """
+        cold_restart = self.cold_restart_every > 0 and self.n_inferences % self.cold_restart_every == 0
+        self.n_inferences += 1
+        return self.has_parameters and not cold_restart
+
+    def reset(self):
+        self.clear()
+        self.n_inferences = 0
+
+    def store_optimum(self, model: gpflow.models.BayesianModel):
+        self.clear()
+        self.store_parameters_from_model(model)
+
+    def load_optimum_to_model(self, model: gpflow.models.BayesianModel):
+        self.load_parameters_to_model(model, 0)
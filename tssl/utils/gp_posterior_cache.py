@@ -0,0 +1,132 @@
+"""
+// Copyright (c) 2024 Robert Bosch GmbH
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU Affero General Public License as published
+// by the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU Affero General Public License for more details.
+//
+// You should have received a copy of the GNU Affero General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from typing import Tuple
+import numpy as np
+import tensorflow as tf
+
+
+class GPPosteriorCache:
+    r"""
+    Class to cache the posterior factors of a GP with fixed hyperparameters:
+        L = cholesky(K(X, X) + noise), alpha = L^{-1} (Y - m(X))
+
+    Predictions only need the cross covariance and triangular solves with L.
+    When data are appended to X, L is extended by a border update (O(n^2 m) for m new points)
+    instead of a full refactorization (O(n^3)).
+    The cache does not know the kernel - the owning model has to compute the covariances and
+    has to clear the cache whenever the hyperparameters change.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.X = None
+        self.Y = None
+        self.L = None
+        self.alpha = None
+
+    @property
+    def is_valid(self) -> bool:
+        return self.L is not None
+
+    @property
+    def num_data(self) -> int:
+        if not self.is_valid:
+            return 0
+        return int(self.L.shape[0])
+
+    def set_factors(self, X: tf.Tensor, Y: tf.Tensor, L: tf.Tensor, err: tf.Tensor):
+        r"""
+        X: [N, D] inputs of the data
+        Y: [N, R] outputs of the data (only kept to check if new data extend the cached data)
+        L: [N, N] lower cholesky of the noisy gram matrix
+        err: [N, R] residual Y - m(X)
+        """
+        self.X = tf.convert_to_tensor(X)
+        self.Y = tf.convert_to_tensor(Y)
+        self.L = tf.convert_to_tensor(L)
+        self.alpha = tf.linalg.triangular_solve(self.L, err, lower=True)
+
+    def is_extended_by(self, X: np.ndarray, Y: np.ndarray) -> bool:
+        r"""
+        checks if the cached data are the leading rows of (X, Y)
+        """
+        if not self.is_valid:
+            return False
+        n = self.num_data
+        if np.shape(X)[0] < n:
+            return False
+        return np.array_equal(np.asarray(X)[:n], self.X.numpy()) and np.array_equal(np.asarray(Y)[:n], self.Y.numpy())
+
+    def extend(self, X_new: tf.Tensor, Y_new: tf.Tensor, K_cross: tf.Tensor, K_new: tf.Tensor, err_new: tf.Tensor):
+        r"""
+        border update of the cholesky factor when m data points are appended
+
+        X_new: [m, D] new inputs
+        Y_new: [m, R] new outputs
+        K_cross: [N, m] covariance between cached and new inputs
+        K_new: [m, m] noisy covariance of the new inputs
+        err_new: [m, R] residual of the new data
+        """
+        assert self.is_valid
+        L_cross = tf.linalg.triangular_solve(self.L, K_cross, lower=True) # [N, m]
+        L_new = tf.linalg.cholesky(K_new - tf.matmul(L_cross, L_cross, transpose_a=True))
+        alpha_new = tf.linalg.triangular_solve(
+            L_new,
+            err_new - tf.matmul(L_cross, self.alpha, transpose_a=True),
+            lower=True
+        )
+        self.L = tf.concat([
+            tf.concat([self.L, tf.zeros_like(L_cross)], axis=-1),
+            tf.concat([tf.transpose(L_cross), L_new], axis=-1)
+        ], axis=-2)
+        self.alpha = tf.concat([self.alpha, alpha_new], axis=-2)
+        self.X = tf.concat([self.X, tf.convert_to_tensor(X_new, dtype=self.X.dtype)], axis=0)
+        self.Y = tf.concat([self.Y, tf.convert_to_tensor(Y_new, dtype=self.Y.dtype)], axis=0)
+
+    def log_marginal_likelihood(self) -> float:
+        r"""
+        log marginal likelihood of the cached data, O(N) as the factors are available
+        """
+        assert self.is_valid
+        R = self.alpha.shape[-1]
+        lml = -0.5 * tf.reduce_sum(tf.square(self.alpha))
+        lml -= R * tf.reduce_sum(tf.math.log(tf.linalg.diag_part(self.L)))
+        lml -= 0.5 * self.num_data * R * np.log(2 * np.pi)
+        return lml.numpy()
+
+    def predict_f(self, Kmn: tf.Tensor, Knn: tf.Tensor, full_cov: bool = False) -> Tuple[tf.Tensor, tf.Tensor]:
+        r"""
+        Kmn: [N, N*] covariance between cached inputs and test inputs
+        Knn: [N*, N*] if full_cov else [N*], prior covariance of test inputs
+
+        return:
+            [N*, R] posterior mean without the mean function
+            [N*, R] posterior variance or [R, N*, N*] posterior covariance if full_cov
+        """
+        assert self.is_valid
+        A = tf.linalg.triangular_solve(self.L, Kmn, lower=True) # [N, N*]
+        f_mean = tf.matmul(A, self.alpha, transpose_a=True)
+        R = tf.shape(self.alpha)[-1]
+        if full_cov:
+            f_var = Knn - tf.matmul(A, A, transpose_a=True)
+            f_var = tf.tile(f_var[None, ...], [R, 1, 1])
+        else:
+            f_var = Knn - tf.reduce_sum(tf.square(A), axis=0)
+            f_var = tf.tile(f_var[:, None], [1, R])
+        return f_mean, f_var
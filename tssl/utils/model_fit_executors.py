@@ -0,0 +1,229 @@
+"""
+// Copyright (c) 2024 Robert Bosch GmbH
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU Affero General Public License as published
+// by the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU Affero General Public License for more details.
+//
+// You should have received a copy of the GNU Affero General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import multiprocessing
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import gpflow
+import tensorflow as tf
+from tssl.models.base_model import BaseModel
+
+logger = logging.getLogger(__name__)
+
+THREAD_ENV_VARIABLES = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]
+
+# persistent worker pools of the multistart optimization, one per number of workers (spawning workers is expensive)
+_shared_process_pools = {}
+
+
+def fit_model(model: BaseModel, x_data: np.ndarray, y_data: np.ndarray, refit: bool) -> Optional[float]:
+    """
+    fits a single model - retrains the hyperparameters (refit) or only conditions on the data
+
+    Returns:
+        time of the fit (as returned by infer/condition_on_data)
+    """
+    if refit:
+        model.reset_model()
+        return model.infer(x_data, y_data)
+    else:
+        return model.condition_on_data(x_data, y_data)
+
+
+def threads_per_worker(n_workers: int) -> int:
+    """
+    splits the cores of the machine evenly over n_workers concurrent fits
+    """
+    return max(1, (os.cpu_count() or 1) // n_workers)
+
+
+def initialize_worker(n_threads: int, gpflow_config: gpflow.config.Config):
+    """
+    initializer of spawned worker processes - restricts TF/BLAS to the thread budget of the worker and
+    takes over the gpflow config of the main process (e.g. default float and jitter)
+    """
+    for name in THREAD_ENV_VARIABLES:
+        os.environ[name] = str(n_threads)
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError:
+        logger.warning("TF runtime already initialized - thread budget of worker is not applied")
+    gpflow.config.set_config(gpflow_config)
+
+
+def create_process_pool(n_workers: int, n_threads_per_worker: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    pool of spawned worker processes with an even share of the cores for each worker
+    """
+    if n_threads_per_worker is None:
+        n_threads_per_worker = threads_per_worker(n_workers)
+    return ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initialize_worker,
+        initargs=(n_threads_per_worker, gpflow.config.config()),
+    )
+
+
+def get_shared_process_pool(n_workers: int) -> ProcessPoolExecutor:
+    if n_workers not in _shared_process_pools:
+        _shared_process_pools[n_workers] = create_process_pool(n_workers)
+    return _shared_process_pools[n_workers]
+
+
+def multi_start_seeds(n_starts: int, seed: Optional[int] = None) -> List[int]:
+    """
+    independent seeds for the restarts of a multistart optimization - restart i gets the same seed for a fixed seed,
+    no matter how the restarts are distributed over workers. Without seed, the base seed is drawn from np.random.
+    """
+    if seed is None:
+        seed = np.random.randint(2**31 - 1)
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(n_starts)]
+
+
+def seed_restart(seed: int):
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+
+
+def _single_start_in_worker(model: BaseModel, start_index: int, seed: int, optimization_kwargs: dict) -> Tuple[float, List[np.ndarray]]:
+    return model.single_start_optimization(start_index, seed, **optimization_kwargs)
+
+
+def run_multi_start_optimization(
+    model: BaseModel,
+    seeds: Sequence[int],
+    n_workers: int = 1,
+    **optimization_kwargs
+) -> List[Tuple[float, List[np.ndarray]]]:
+    """
+    runs model.single_start_optimization(i, seeds[i], **optimization_kwargs) for all restarts, either serially (the global numpy
+    random state is restored afterwards) or distributed over n_workers spawned processes, each working on a pickled copy of the model
+
+    Returns:
+        list of (loss, trainable parameter values) of the restarts
+    """
+    if n_workers <= 1:
+        random_state = np.random.get_state()
+        try:
+            return [model.single_start_optimization(i, seed, **optimization_kwargs) for i, seed in enumerate(seeds)]
+        finally:
+            np.random.set_state(random_state)
+    pool = get_shared_process_pool(n_workers)
+    futures = [pool.submit(_single_start_in_worker, model, i, seed, optimization_kwargs) for i, seed in enumerate(seeds)]
+    return [future.result() for future in futures]
+
+
+def _fit_model_in_worker(model: BaseModel, x_data: np.ndarray, y_data: np.ndarray, refit: bool) -> Tuple[BaseModel, Optional[float]]:
+    t = fit_model(model, x_data, y_data, refit)
+    return model, t
+
+
+class BaseFitExecutor(ABC):
+    """
+    Strategy how the SafeActiveLearner fits its main and safety models - the fits are independent of each other
+    """
+
+    @abstractmethod
+    def fit(self, models: Sequence[BaseModel], datasets: Sequence[Tuple[np.ndarray, np.ndarray]], refit: bool) -> List[Optional[float]]:
+        """
+        Arguments:
+            models: models to fit
+            datasets: (x_data, y_data) for each model
+            refit: bool if the hyperparameters are retrained or the models are only conditioned on the data
+
+        Returns:
+            list of the fit times of the models
+        """
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class SequentialFitExecutor(BaseFitExecutor):
+    """
+    fits the models one after another (default)
+    """
+
+    def fit(self, models: Sequence[BaseModel], datasets: Sequence[Tuple[np.ndarray, np.ndarray]], refit: bool) -> List[Optional[float]]:
+        return [fit_model(model, x, y, refit) for model, (x, y) in zip(models, datasets)]
+
+
+class ThreadFitExecutor(BaseFitExecutor):
+    """
+    fits the models concurrently in a thread pool - the TF kernels release the GIL, but all threads share the
+    TF/BLAS thread pools of the process, so the thread budget can only be set globally before TF is initialized
+
+    Arguments:
+        n_workers: number of threads
+    """
+
+    def __init__(self, n_workers: int):
+        self.n_workers = n_workers
+        self.pool = ThreadPoolExecutor(max_workers=n_workers)
+
+    def fit(self, models: Sequence[BaseModel], datasets: Sequence[Tuple[np.ndarray, np.ndarray]], refit: bool) -> List[Optional[float]]:
+        futures = [self.pool.submit(fit_model, model, x, y, refit) for model, (x, y) in zip(models, datasets)]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+class ProcessFitExecutor(BaseFitExecutor):
+    """
+    fits the models concurrently in spawned worker processes - the models are pickled to the workers and the fitted
+    state (kernel parameters, likelihood variances and cached factors) is shipped back and loaded into the models of the
+    main process. Each worker gets an equal share of the cores for TF and BLAS.
+    Conditioning on data (refit=False) is cheap and runs in the main process.
+
+    Arguments:
+        n_workers: number of worker processes
+        n_threads_per_worker: TF/BLAS threads per worker - default splits the cores evenly
+    """
+
+    def __init__(self, n_workers: int, n_threads_per_worker: Optional[int] = None):
+        self.n_workers = n_workers
+        self.n_threads_per_worker = n_threads_per_worker if n_threads_per_worker is not None else threads_per_worker(n_workers)
+        self.pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            self.pool = create_process_pool(self.n_workers, self.n_threads_per_worker)
+        return self.pool
+
+    def fit(self, models: Sequence[BaseModel], datasets: Sequence[Tuple[np.ndarray, np.ndarray]], refit: bool) -> List[Optional[float]]:
+        if not refit:
+            return SequentialFitExecutor().fit(models, datasets, refit)
+        pool = self._get_pool()
+        futures = [pool.submit(_fit_model_in_worker, model, x, y, refit) for model, (x, y) in zip(models, datasets)]
+        fit_times = []
+        for model, future in zip(models, futures):
+            fitted_model, t = future.result()
+            model.__dict__.update(fitted_model.__dict__)
+            fit_times.append(t)
+        return fit_times
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None